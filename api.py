@@ -0,0 +1,151 @@
+"""HTTP front end for the chat engine (plain ASGI, no web framework).
+
+Run with e.g.:
+    uvicorn api:app --host 0.0.0.0 --port 8000 --workers 4
+
+POST /chat    {"message": "...", "session_id": "<optional>"}
+              -> {"session_id", "reply", "route", "disease"}
+GET  /healthz -> {"status": "ok", "diseases": <count>}
+GET  /metrics -> Prometheus text format (?format=json for JSON with slow-request traces)
+
+Send the login token as "Authorization: Bearer <token>" unless REQUIRE_LOGIN=0.
+/metrics takes "Authorization: Bearer $METRICS_TOKEN" instead when METRICS_TOKEN is set.
+"""
+import asyncio
+import hmac
+import json
+import os
+from urllib.parse import parse_qs
+
+import metrics
+import tracing
+from auth_tokens import get_verifier
+from chat_engine import get_chat_engine, new_session
+from session_store import get_session_store, new_session_id
+
+REQUIRE_LOGIN = os.getenv("REQUIRE_LOGIN", "1") != "0"
+MAX_BODY_BYTES = 64 * 1024
+MAX_SESSION_ID_LENGTH = 128
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+async def read_body(receive):
+    body = b""
+    while True:
+        event = await receive()
+        body += event.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large.")
+        if not event.get("more_body"):
+            return body
+
+
+async def send_json(send, status, payload):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json; charset=utf-8"), (b"content-length", str(len(body)).encode("ascii"))],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_text(send, status, text, content_type=b"text/plain; version=0.0.4; charset=utf-8"):
+    body = text.encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode("ascii"))],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def bearer_token(scope):
+    headers = dict(scope.get("headers") or [])
+    auth = headers.get(b"authorization", b"").decode("latin-1")
+    return auth[7:].strip() if auth.lower().startswith("bearer ") else None
+
+
+def authenticate(scope):
+    """Token claims, or None when login is not required. Raises HTTPError(401) otherwise."""
+    token = bearer_token(scope)
+    claims = get_verifier().verify(token) if token else None
+    if claims is None and REQUIRE_LOGIN:
+        raise HTTPError(401, "Missing or invalid session token.")
+    return claims
+
+
+async def chat(scope, receive):
+    claims = authenticate(scope)
+    try:
+        payload = json.loads(await read_body(receive) or b"{}")
+    except json.JSONDecodeError:
+        raise HTTPError(400, "Body must be JSON.")
+    message = payload.get("message") if isinstance(payload, dict) else None
+    if not isinstance(message, str) or not message.strip():
+        raise HTTPError(400, "'message' must be a non-empty string.")
+
+    store = get_session_store()
+    # sessions are owned by username, as in app.py, so both front ends see the same user's chats
+    owner = claims["name"] if claims else None
+    session_id = payload.get("session_id") or new_session_id()
+    if not isinstance(session_id, str) or len(session_id) > MAX_SESSION_ID_LENGTH:
+        raise HTTPError(400, f"'session_id' must be a string of at most {MAX_SESSION_ID_LENGTH} characters.")
+    # routing, the Cohere calls and the session store's disk / network I/O block, so they run on a
+    # thread while the event loop keeps serving
+    session = await asyncio.to_thread(store.load, session_id) or dict(new_session(), user=owner)
+    if session.get("user") != owner:
+        raise HTTPError(403, "Session belongs to another user.")
+
+    reply = await asyncio.to_thread(get_chat_engine().handle, session, message)
+    await asyncio.to_thread(store.save, session_id, session)
+    return {"session_id": session_id, "reply": reply.html, "route": reply.route, "disease": reply.disease}
+
+
+async def metrics_endpoint(scope, send):
+    if METRICS_TOKEN and not hmac.compare_digest(bearer_token(scope) or "", METRICS_TOKEN):
+        raise HTTPError(401, "Missing or invalid metrics token.")
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    if query.get("format") == ["json"]:
+        await send_json(send, 200, dict(metrics.export_json(), slow_requests=tracing.slow_requests()))
+    else:
+        await send_text(send, 200, metrics.prometheus_text())
+
+
+async def lifespan(receive, send):
+    while True:
+        event = await receive()
+        if event["type"] == "lifespan.startup":
+            # build the knowledge base, matcher and classifier before the first request
+            await asyncio.to_thread(get_chat_engine().warm)
+            await send({"type": "lifespan.startup.complete"})
+        elif event["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+    route = (scope["method"], scope["path"].rstrip("/") or "/")
+    try:
+        if route == ("POST", "/chat"):
+            await send_json(send, 200, await chat(scope, receive))
+        elif route == ("GET", "/healthz"):
+            await send_json(send, 200, {"status": "ok", "diseases": len(get_chat_engine().kb.disease_names)})
+        elif route == ("GET", "/metrics"):
+            await metrics_endpoint(scope, send)
+        else:
+            raise HTTPError(404, "Not found.")
+    except HTTPError as e:
+        await send_json(send, e.status, {"error": e.message})
@@ -1,17 +1,25 @@
 # app.py
-import json
 import os
 import time
 import datetime
-from difflib import get_close_matches
 
 import streamlit as st
-import cohere
+
+import metrics
+from metrics_server import start_metrics_server
+from auth_tokens import get_verifier
+from chat_engine import get_chat_engine
+from conversation_log import CONV_DIR, new_conversation_id
+from conversation_store import get_conversation_store
+from knowledge_base import load_knowledge_base
+from session_store import get_session_store, new_session_id
+from tracing import span
 
 # ----------------------------
 # CONFIG
 # ----------------------------
 st.set_page_config(page_title="🧠 Mental Health Chatbot", layout="wide")
+start_metrics_server()  # no-op unless METRICS_PORT is set; login.py starts it too
 
 # ----------------------------
 # STYLES (your UI)
@@ -89,216 +97,154 @@ body, .main {
 <div class="navbar">🧠 Mental Health Chatbot</div>
 """, unsafe_allow_html=True)
 
+# ----------------------------
+# Authentication: signed session token issued by login.py (cached verification, no DB hit per rerun)
+# ----------------------------
+REQUIRE_LOGIN = os.getenv("REQUIRE_LOGIN", "1") != "0"
+
+# the token lives only in this browser session's state (set by login.py in the same process), never in the URL
+auth_token = st.session_state.get("auth_token")
+claims = get_verifier().verify(auth_token)
+if claims:
+    st.session_state.user_id = claims["sub"]
+    st.session_state.username = claims["name"]
+elif REQUIRE_LOGIN:
+    st.warning("🔐 Please log in first (run `streamlit run login.py`).")
+    st.stop()
+
 # ----------------------------
 # Load JSON (support both original and intent-format)
 # ----------------------------
-JSON_PATHS = ["intent_format_1000lines.json", "disease_medicine_doctor_intents.json", "med_doctors_warangal.json", "med_doctors_warangal_intent.json"]
-json_file = None
-for p in JSON_PATHS:
-    if os.path.exists(p):
-        json_file = p
-        break
-
-if json_file is None:
+# Parsed once per process and shared by all sessions; reloaded only when the file changes.
+try:
+    kb = load_knowledge_base()
+except FileNotFoundError:
     st.error("No JSON file found. Please place med_doctors_warangal.json or intent_format_1000lines.json in the app folder.")
     st.stop()
+except ValueError:
+    st.error("Unrecognized JSON structure.")
+    st.stop()
 
-with open(json_file, "r", encoding="utf-8") as f:
-    raw = json.load(f)
-
-# Normalize into internal structure: list of disease dicts with keys: name, medicines (list), doctors (list)
-disease_data = []
-
-if isinstance(raw, dict) and "intents" in raw:
-    for it in raw["intents"]:
-        name = it.get("tag") or it.get("intent") or it.get("disease") or ""
-        meds = it.get("medicines") or it.get("medicine") or []
-        docs = it.get("doctor") or it.get("doctors") or it.get("warangal_doctors") or []
-        # if doctor entries are dicts with name/hospital, keep; else leave as-is
-        disease_data.append({"name": name, "medicines": meds, "doctors": docs})
-elif isinstance(raw, dict) and "diseases" in raw:
-    # original format
-    for d in raw["diseases"]:
-        name = d.get("name") or d.get("disease") or ""
-        meds = d.get("medicines") or d.get("medicines_list") or []
-        docs = d.get("warangal_doctors") or d.get("warangal_doctors_list") or d.get("warangal_doctors", []) or d.get("doctor", [])
-        disease_data.append({"name": name, "medicines": meds, "doctors": docs})
-else:
-    # try to interpret as list-of-objects
-    if isinstance(raw, list):
-        for d in raw:
-            name = d.get("disease") or d.get("tag") or d.get("intent") or d.get("name") or ""
-            meds = d.get("medicines") or d.get("medicine") or []
-            docs = d.get("doctor") or d.get("doctors") or []
-            disease_data.append({"name": name, "medicines": meds, "doctors": docs})
-    else:
-        st.error("Unrecognized JSON structure.")
-        st.stop()
+# Internal structure: list of disease dicts with keys: name, medicines (list), doctors (list)
+disease_data = kb.disease_data
 
 # Build quick lookup structures (base names)
-disease_names = [d["name"] for d in disease_data]
-disease_names_lower = [n.lower() for n in disease_names]
-
-# Helper: normalize predicted/queried disease to base by removing prefixes like "acute", "chronic" etc.
-def normalize_to_base(name: str) -> str:
-    if not name:
-        return name
-    n = name.strip()
-    lower = n.lower()
-    # remove common prefixes
-    for prefix in ["acute ", "chronic ", "severe ", "mild "]:
-        if lower.startswith(prefix):
-            n = n[len(prefix):].strip()
-            break
-    # also if name contains parentheses or extra suffix, strip after '('
-    if "(" in n:
-        n = n.split("(")[0].strip()
-    return n
-
-# Exact base-disease finder (Option 1): match normalized base name exactly against disease list (case-insensitive)
+disease_names = kb.disease_names
+disease_names_lower = kb.disease_names_lower
+
+# Exact base-disease finder (Option 1): O(1) lookup of the normalized base name (case-insensitive)
 def find_disease_exact(query: str):
-    if not query:
-        return None
-    q = normalize_to_base(query).strip().lower()
-    for d in disease_data:
-        if d["name"].strip().lower() == q:
-            return d
-    return None
-
-# Also provide fuzzy fallback (but only after normalization) — still keep Option 1 behavior by preferring exact base
-def find_disease_fuzzy(query: str):
-    q = normalize_to_base(query).strip().lower()
-    # exact first
-    exact = find_disease_exact(q)
-    if exact:
-        return exact
-    # fuzzy match from disease names
-    matches = get_close_matches(q, disease_names_lower, n=1, cutoff=0.6)
-    if matches:
-        best = matches[0]
-        for d in disease_data:
-            if d["name"].strip().lower() == best:
-                return d
-    return None
+    return kb.index.exact(query)
 
-# ----------------------------
-# Cohere setup
-# ----------------------------
-COHERE_API_KEY = "sWmE1lyhhw4XomK8LVSW58LlX0fe4ke89B1fxFvz"
-co = cohere.Client(COHERE_API_KEY)
-COHERE_MODEL = "command-a-03-2025"
-
-def normalize_remedies_text(raw: str):
-    if not raw:
-        return "<i>No remedies available.</i>"
-    text = raw.strip()
-    # convert markdown bold to HTML
-    text = text.replace("**", "")
-    # replace common bullet markers with newline-dash
-    for sym in ["•", "–", "—", "•\u00A0"]:
-        text = text.replace(sym, "\n- ")
-    # split lines and build UL if lines contain '-'
-    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
-    if any(ln.startswith("-") for ln in lines):
-        items = []
-        for ln in lines:
-            if ln.startswith("-"):
-                items.append(ln.lstrip("- ").strip())
-            else:
-                items.append(ln)
-        return "<ul>" + "".join(f"<li>{it}</li>" for it in items) + "</ul>"
-    else:
-        # join paragraphs
-        return "<br>".join(lines)
-
-def get_remedies_from_cohere(disease_name: str):
-    prompt = f"Give 5 simple, safe home remedies for {disease_name}. Use short bullet points, each on a new line. Keep them non-prescriptive."
-    try:
-        resp = co.chat(model=COHERE_MODEL, message=prompt, temperature=0.6, max_tokens=220)
-        text = resp.text
-        return normalize_remedies_text(text)
-    except Exception as e:
-        return f"<i>⚠️ Cohere error: {e}</i>"
-
-# Cohere-based prediction (conservative): returns base disease name or 'unknown'
-def predict_disease_from_symptoms(symptoms: str):
-    # If user typed a single token that exactly matches base disease, return it
-    tokens = [t for t in symptoms.strip().split() if t.strip()]
-    if len(tokens) == 1:
-        local = find_disease_exact(tokens[0])
-        if local:
-            return local["name"]
-    # Ask Cohere to classify
-    prompt = f"""
-You are a cautious clinical classifier. Based on the user's symptoms below, return EXACTLY one disease name from the provided list or 'unknown'.
-
-Symptoms:
-{symptoms}
-
-Possible conditions:
-{', '.join(disease_names)}
-
-Return exactly one value (disease name) or 'unknown'.
-"""
-    try:
-        res = co.chat(model=COHERE_MODEL, message=prompt, temperature=0.15, max_tokens=30)
-        predicted = res.text.strip().strip('"').strip()
-        # normalize and try to match base
-        normalized = normalize_to_base(predicted)
-        match = find_disease_exact(normalized)
-        if match:
-            return match["name"]
-        # if the returned predicted is exactly a disease in DB, return
-        if find_disease_fuzzy(predicted):
-            return find_disease_fuzzy(predicted)["name"]
-        return "unknown"
-    except Exception:
-        return "unknown"
+# Routing, classification and remedies live in the headless engine (chat_engine.py), shared by all sessions
+engine = get_chat_engine()
 
 # ----------------------------
 # Session state & conversations
 # ----------------------------
+# Chat state is mirrored to the shared session store under ?sid=..., so a restart or another replica
+# picks the conversation up where it left off (including a pending medicine/doctor/both follow-up).
+CHAT_STATE_FIELDS = ["messages", "pending_disease", "offered_disease", "conversation_id", "persisted_count"]
+session_store = get_session_store()
+
+if "session_id" not in st.session_state:
+    sid = st.query_params.get("sid")
+    restored = session_store.load(sid) if sid else None
+    if restored and restored.get("user") == st.session_state.get("username"):
+        for key in CHAT_STATE_FIELDS:
+            if key in restored:
+                st.session_state[key] = restored[key]
+    else:
+        sid = new_session_id()
+    st.session_state.session_id = sid
+if st.query_params.get("sid") != st.session_state.session_id:
+    st.query_params["sid"] = st.session_state.session_id
+
 if "messages" not in st.session_state:
     st.session_state.messages = []  # list of {"role":"user"|"ai", "message": "<html>"}
 
 if "pending_disease" not in st.session_state:
     st.session_state.pending_disease = None
 
-CONV_DIR = "conversations"
-os.makedirs(CONV_DIR, exist_ok=True)
+if "offered_disease" not in st.session_state:
+    st.session_state.offered_disease = None  # doctors offered with a conversational answer
+
+if "conversation_id" not in st.session_state:
+    st.session_state.conversation_id = new_conversation_id()
+    st.session_state.persisted_count = 0  # messages already written to the conversation log
+
+HISTORY_LOAD_LIMIT = 200  # newest messages loaded when opening a saved chat
+CHATS_PER_PAGE = 20
+HISTORY_PAGE = int(os.getenv("CHAT_HISTORY_PAGE", 40))  # messages painted at first; "load older" adds this many
+
+if "history_shown" not in st.session_state:
+    st.session_state.history_shown = HISTORY_PAGE
 
+# Catalog is opened once per process (old *.json chats: python conversation_store.py --migrate --user <name>)
+@st.cache_resource(show_spinner=False)
+def get_store():
+    os.makedirs(CONV_DIR, exist_ok=True)
+    return get_conversation_store(CONV_DIR)
+
+conversation_store = get_store()
+current_user = st.session_state.get("username")
+
+# Append only the messages added since the last save to this conversation's log
 def save_conversation_file():
     if not st.session_state.messages:
         return None
-    fname = datetime.datetime.now().strftime("%Y%m%d_%H%M%S.json")
-    path = os.path.join(CONV_DIR, fname)
-    with open(path, "w", encoding="utf-8") as fw:
-        json.dump(st.session_state.messages, fw, ensure_ascii=False, indent=2)
-    return fname
-
-def list_conversations():
-    return sorted([f for f in os.listdir(CONV_DIR) if f.endswith(".json")], reverse=True)
-
-def load_conversation(filename):
-    path = os.path.join(CONV_DIR, filename)
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as fr:
-            st.session_state.messages = json.load(fr)
-        st.session_state.pending_disease = None
-        return True
-    return False
+    new_messages = st.session_state.messages[st.session_state.persisted_count:]
+    conversation_store.append(st.session_state.conversation_id, new_messages, user=current_user)
+    st.session_state.persisted_count = len(st.session_state.messages)
+    return st.session_state.conversation_id
+
+# Write the fields that changed since the last save (new messages are appended) to the session store
+def save_session_state():
+    state = {key: st.session_state.get(key) for key in CHAT_STATE_FIELDS}
+    state["user"] = current_user
+    session_store.save(st.session_state.session_id, state)
+
+def list_conversations(page: int = 0):
+    return conversation_store.list(user=current_user, limit=CHATS_PER_PAGE, offset=page * CHATS_PER_PAGE)
+
+def load_conversation(conversation_id):
+    info = conversation_store.info(conversation_id)
+    if not info or info["user"] != current_user:
+        return False
+    # keep appending to the same log; only the newest messages are read
+    st.session_state.messages = conversation_store.read_tail(conversation_id, HISTORY_LOAD_LIMIT)
+    st.session_state.conversation_id = conversation_id
+    st.session_state.persisted_count = len(st.session_state.messages)
+    st.session_state.pending_disease = None
+    st.session_state.offered_disease = None
+    st.session_state.history_shown = HISTORY_PAGE
+    save_session_state()
+    return True
 
 # ----------------------------
 # Sidebar: Chat Logs & Quick Lookup
 # ----------------------------
 st.sidebar.title("📁 Chat Logs (Saved)")
-convs = list_conversations()
+chat_page = st.session_state.get("chat_page", 0)
+convs = list_conversations(chat_page)
 if convs:
-    selected_log = st.sidebar.selectbox("Open saved chat", [""] + convs)
-    if selected_log:
+    labels = {c["id"]: f"{c['title']} · {datetime.datetime.fromtimestamp(c['updated_at']):%d %b %H:%M}" for c in convs}
+    selected_log = st.sidebar.selectbox("Open saved chat", [""] + list(labels), format_func=lambda cid: labels.get(cid, ""))
+    # load once per selection; reloading on every rerun would discard the new messages
+    if selected_log and selected_log != st.session_state.get("loaded_log"):
         loaded = load_conversation(selected_log)
         if loaded:
-            st.sidebar.success(f"Loaded {selected_log}")
+            st.session_state.loaded_log = selected_log
+            st.sidebar.success(f"Loaded {labels[selected_log]}")
+    total_pages = (conversation_store.count(user=current_user) - 1) // CHATS_PER_PAGE + 1
+    if total_pages > 1:
+        newer, older = st.sidebar.columns(2)
+        if newer.button("⬅ Newer", disabled=chat_page == 0):
+            st.session_state.chat_page = chat_page - 1
+            st.rerun()
+        if older.button("Older ➡", disabled=chat_page >= total_pages - 1):
+            st.session_state.chat_page = chat_page + 1
+            st.rerun()
 else:
     st.sidebar.write("No saved chats yet.")
 
@@ -307,45 +253,33 @@ selected_quick = st.sidebar.selectbox("Search disease", [""] + disease_names)
 if selected_quick:
     rec = find_disease_exact(selected_quick)
     if rec:
-        st.sidebar.markdown(f"**{rec.get('name')}**")
-        st.sidebar.markdown("**Medicines:**")
-        for m in rec.get("medicines", []):
-            st.sidebar.write(f"- {m}")
-        st.sidebar.markdown("**Doctors:**")
-        for d in rec.get("doctors", [])[:6]:
-            # If doctor entries are dicts, format nicely
-            if isinstance(d, dict):
-                name = d.get("name", "Unknown")
-                hosp = d.get("hospital", "")
-                spec = d.get("specialization", "")
-                st.sidebar.write(f"- {name} ({spec}) — {hosp}")
-            else:
-                st.sidebar.write(f"- {d}")
+        # rendered once per disease by the doctor directory (doctor_directory.py)
+        st.sidebar.markdown(engine.directory.sidebar_markdown(rec["name"]))
 
 # ----------------------------
 # Render chat messages
 # ----------------------------
-st.markdown("<div class='chat-box'>", unsafe_allow_html=True)
-for msg in st.session_state.messages:
-    role = msg.get("role", "ai")
-    st.markdown(f"""<div class="chat-line {role}"><div class="chat-bubble">{msg.get('message')}</div></div>""", unsafe_allow_html=True)
-st.markdown("</div>", unsafe_allow_html=True)
-
-# ----------------------------
-# Intent keywords (Option A rules)
-# ----------------------------
-MED_KEYWORDS = ["medicine", "medicines", "tablet", "tablets", "dose", "treatment", "drug", "meds"]
-DOC_KEYWORDS = ["doctor", "doctors", "specialist", "hospital", "clinic", "consult", "see a doctor"]
-BOTH_KEYWORDS = ["both", "both please", "medicine and doctor", "medicine & doctor", "medicines and doctors"]
-
-def contains_any(text: str, keywords):
-    t = text.lower()
-    return any(k in t for k in keywords)
-
-def html_bullet_list(items):
-    if not items:
-        return "<i>None listed</i>"
-    return "<ul>" + "".join(f"<li>{it}</li>" for it in items) + "</ul>"
+# Only the newest `history_shown` messages are painted, as one pre-rendered HTML block (one element per
+# rerun instead of one per message).
+def bubble_html(role, message):
+    return f"""<div class="chat-line {role}"><div class="chat-bubble">{message}</div></div>"""
+
+# runs before the rerun the click triggers, so the page is painted once with the larger window
+def show_older_messages():
+    st.session_state.history_shown += HISTORY_PAGE
+
+with span("render_history"):
+    messages = st.session_state.messages
+    hidden = max(len(messages) - st.session_state.history_shown, 0)
+    if hidden:
+        st.button(f"⬆ Load older messages ({hidden} more)", key="load_older", on_click=show_older_messages)
+    visible = "".join(bubble_html(m.get("role", "ai"), m.get("message")) for m in messages[hidden:])
+    st.markdown(f"<div class='chat-box'>{visible}</div>", unsafe_allow_html=True)
+
+# Startup / page-switch instrumentation (compare with launching a separate server per login)
+metrics.mark_startup("chat_first_render")
+if "login_at" in st.session_state:
+    metrics.record_timing("login_to_chat", time.perf_counter() - st.session_state.pop("login_at"))
 
 # ----------------------------
 # Input handling
@@ -353,148 +287,19 @@ def html_bullet_list(items):
 user_input = st.chat_input("Type your symptoms or question...")
 
 if user_input:
-    # store user message first
-    st.session_state.messages.append({"role": "user", "message": user_input})
-
-    u = user_input.strip()
-    u_lower = u.lower()
-
-    # 1) If pending_disease exists, interpret user input as follow-up choice
-    if st.session_state.pending_disease:
-        choice = u_lower
-        disease_name = st.session_state.pending_disease
-        record = find_disease_exact(disease_name)
-        if not record:
-            reply_html = "Sorry — couldn't find disease details. Try again."
-        else:
-            if contains_any(choice, MED_KEYWORDS) and not contains_any(choice, DOC_KEYWORDS):
-                reply_html = f"<b>💊 Medicines for {record.get('name')}:</b><br>{html_bullet_list(record.get('medicines', []))}"
-            elif contains_any(choice, DOC_KEYWORDS) and not contains_any(choice, MED_KEYWORDS):
-                docs = record.get("doctors", [])
-                docs_html = "<ul>"
-                for d in docs:
-                    if isinstance(d, dict):
-                        docs_html += f"<li><b>{d.get('name','Unknown')}</b> — {d.get('specialization','')} ({d.get('hospital','')})</li>"
-                    else:
-                        docs_html += f"<li>{d}</li>"
-                docs_html += "</ul>"
-                reply_html = f"<b>👨‍⚕️ Doctors for {record.get('name')}:</b><br>{docs_html}"
-            elif contains_any(choice, BOTH_KEYWORDS) or (contains_any(choice, MED_KEYWORDS) and contains_any(choice, DOC_KEYWORDS)):
-                med_html = html_bullet_list(record.get('medicines', []))
-                docs = record.get("doctors", [])
-                docs_html = "<ul>"
-                for d in docs:
-                    if isinstance(d, dict):
-                        docs_html += f"<li><b>{d.get('name','Unknown')}</b> - ({d.get('hospital','')})</li>"
-                    else:
-                        docs_html += f"<li>{d}</li>"
-                docs_html += "</ul>"
-                reply_html = f"<b>💊 Medicines for {record.get('name')}:</b><br>{med_html}<br><b>👨‍⚕️ Doctors:</b><br>{docs_html}"
-            else:
-                reply_html = "Please type <b>medicine</b>, <b>doctor</b>, or <b>both</b> (or include the disease name)."
-
-        # clear pending flag
-        st.session_state.pending_disease = None
-
-        # animate and save
-        placeholder = st.empty()
-        lines = reply_html.splitlines()
-        built = ""
-        for line in lines:
-            built += line + "\n"
-            placeholder.markdown(f"""<div class="chat-line ai"><div class="chat-bubble">{built}</div></div>""", unsafe_allow_html=True)
-            time.sleep(0.06)
-        st.session_state.messages.append({"role": "ai", "message": reply_html})
-        save_conversation_file()
+    # the new turn is painted below the history block; the next rerun folds it into the block,
+    # so there is no st.rerun() (and no second repaint of the whole history) after each reply
+    st.markdown(bubble_html("user", user_input), unsafe_allow_html=True)
+    placeholder = st.empty()
+
+    # paint the AI bubble from successive HTML snapshots as the engine streams the reply
+    def paint(html):
+        placeholder.markdown(bubble_html("ai", html), unsafe_allow_html=True)
+
+    engine.handle(st.session_state, user_input, on_chunk=paint)
+    first_save = st.session_state.persisted_count == 0
+    save_conversation_file()
+    save_session_state()
+    if first_save and chat_page == 0:
+        # the sidebar was drawn before this chat existed; one rerun per new chat lists it
         st.rerun()
-
-    # 2) If message explicitly asks for medicine/doctor/both and includes disease name -> serve without prediction
-    elif contains_any(u_lower, MED_KEYWORDS) or contains_any(u_lower, DOC_KEYWORDS) or contains_any(u_lower, BOTH_KEYWORDS):
-        # attempt to detect disease name inside message (exact base match preferred)
-        found = None
-        for name in disease_names:
-            if name.lower() in u_lower:
-                found = name
-                break
-
-        if found:
-            rec = find_disease_exact(found)
-            if not rec:
-                reply_html = "Couldn't find that disease in our database."
-            else:
-                if contains_any(u_lower, MED_KEYWORDS) and not contains_any(u_lower, DOC_KEYWORDS):
-                    reply_html = f"<b>💊 Medicines for {rec.get('name')}:</b><br>{html_bullet_list(rec.get('medicines', []))}"
-                elif contains_any(u_lower, DOC_KEYWORDS) and not contains_any(u_lower, MED_KEYWORDS):
-                    docs_html = "<ul>" + "".join(
-                        f"<li><b>{d.get('name')}</b> — {d.get('specialization')} ({d.get('hospital')})</li>" if isinstance(d, dict) else f"<li>{d}</li>"
-                        for d in rec.get('doctors', [])
-                    ) + "</ul>"
-                    reply_html = f"<b>👨‍⚕️ Doctors for {rec.get('name')}:</b><br>{docs_html}"
-                else:
-                    med_html = html_bullet_list(rec.get('medicines', []))
-                    docs_html = "<ul>" + "".join(
-                        f"<li><b>{d.get('name')}</b> — {d.get('specialization')} ({d.get('hospital')})</li>" if isinstance(d, dict) else f"<li>{d}</li>"
-                        for d in rec.get('doctors', [])
-                    ) + "</ul>"
-                    reply_html = f"<b>💊 Medicines for {rec.get('name')}:</b><br>{med_html}<br><b>👨‍⚕️ Doctors:</b><br>{docs_html}"
-
-            # animate & save
-            placeholder = st.empty()
-            lines = reply_html.splitlines()
-            built = ""
-            for line in lines:
-                built += line + "\n"
-                placeholder.markdown(f"""<div class="chat-line ai"><div class="chat-bubble">{built}</div></div>""", unsafe_allow_html=True)
-                time.sleep(0.05)
-            st.session_state.messages.append({"role": "ai", "message": reply_html})
-            save_conversation_file()
-            st.rerun()
-        else:
-            # No disease in the same message → ask for disease name explicitly (no prediction)
-            reply_html = "I didn't detect the disease name. Please include the disease (e.g., 'medicine for fever') or describe your symptoms so I can predict."
-            st.session_state.messages.append({"role": "ai", "message": reply_html})
-            save_conversation_file()
-            st.rerun()
-
-    # 3) Otherwise treat message as symptoms → predict & provide remedies (Option 1)
-    else:
-        # if user typed a single word that matches base disease, use it directly
-        matched = None
-        toks = [t for t in u.split() if t.strip()]
-        if len(toks) == 1:
-            local = find_disease_exact(toks[0])
-            if local:
-                matched = local
-
-        # try to match input phrase directly (exact base)
-        if not matched:
-            matched = find_disease_exact(u)
-
-        # if still not matched, call classifier
-        if not matched:
-            predicted = predict_disease_from_symptoms(u)
-            if predicted and predicted.lower() != "unknown":
-                matched = find_disease_exact(predicted)
-
-        if matched:
-            disease_name = matched.get("name")
-            remedies_html = get_remedies_from_cohere(disease_name)
-            reply_html = f"<b>🤖 Predicted Condition: {disease_name}</b><br><br><b>🌿 Remedies:</b><br>{remedies_html}<br><br>Would you like <b>medicine</b>, <b>doctor</b>, or <b>both</b>?"
-            st.session_state.pending_disease = disease_name
-
-            # animate & save
-            placeholder = st.empty()
-            lines = reply_html.splitlines()
-            built = ""
-            for line in lines:
-                built += line + "\n"
-                placeholder.markdown(f"""<div class="chat-line ai"><div class="chat-bubble">{built}</div></div>""", unsafe_allow_html=True)
-                time.sleep(0.08)
-            st.session_state.messages.append({"role": "ai", "message": reply_html})
-            save_conversation_file()
-            st.rerun()
-        else:
-            reply_html = "I couldn't identify the condition. Please describe your symptoms more clearly or name the disease."
-            st.session_state.messages.append({"role": "ai", "message": reply_html})
-            save_conversation_file()
-            st.rerun()
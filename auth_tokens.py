@@ -0,0 +1,141 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+# ----------------------------
+# Signed, expiring session tokens + cached verification
+# ----------------------------
+# Set SESSION_SECRET to share tokens across workers, hosts and restarts. Otherwise a random secret is kept in
+# this module only (never written to the environment), so tokens do not survive a restart or move between workers.
+SESSION_SECRET = os.getenv("SESSION_SECRET") or secrets.token_hex(32)
+SESSION_TTL = int(os.getenv("SESSION_TTL", 12 * 3600))
+# how long a verified token is trusted before the user is looked up in MongoDB again
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", 300))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 10000))
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload: str, secret: str) -> str:
+    return _b64(hmac.new(secret.encode("utf-8"), payload.encode("ascii"), hashlib.sha256).digest())
+
+
+def issue_token(user_id: str, username: str, ttl: int = SESSION_TTL, secret: str = None) -> str:
+    now = int(time.time())
+    claims = {"sub": user_id, "name": username, "iat": now, "exp": now + ttl}
+    payload = _b64(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    return f"{payload}.{_sign(payload, secret or SESSION_SECRET)}"
+
+
+def decode_token(token: str, secret: str = None):
+    """Claims of a correctly signed, unexpired token, else None. No database access."""
+    try:
+        payload, signature = token.split(".", 1)
+        if not hmac.compare_digest(signature, _sign(payload, secret or SESSION_SECRET)):
+            return None
+        claims = json.loads(_unb64(payload))
+    except (ValueError, AttributeError):
+        return None
+    if claims.get("exp", 0) < time.time():
+        return None
+    return claims
+
+
+def _lookup_user_in_mongo(user_id: str):
+    from bson import ObjectId
+    from db_users import MONGO_DB_NAME, get_client
+
+    try:
+        key = ObjectId(user_id)
+    except Exception:
+        key = user_id
+    return get_client()[MONGO_DB_NAME]["users"].find_one({"_id": key}, {"username": 1})
+
+
+class TokenVerifier:
+    """Verifies session tokens, hitting the user store only on a cache miss or cache-entry expiry.
+
+    A cached entry is trusted until min(token exp, AUTH_CACHE_TTL from the last
+    lookup). revoke() drops a token immediately (e.g. on logout).
+    """
+
+    def __init__(self, lookup_user=None, cache_ttl=AUTH_CACHE_TTL, max_entries=AUTH_CACHE_SIZE, secret=None):
+        self.lookup_user = lookup_user or _lookup_user_in_mongo
+        self.cache_ttl = cache_ttl
+        self.max_entries = max_entries
+        self.secret = secret
+        self._cache = OrderedDict()  # token -> (claims, trusted_until)
+        self._revoked = {}  # token -> exp
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def verify(self, token: str):
+        """Claims dict for a valid token, else None."""
+        if not token:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(token)
+            if entry is not None and entry[1] > now:
+                self._cache.move_to_end(token)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            if token in self._revoked:
+                return None
+        claims = decode_token(token, self.secret)
+        if claims is None:
+            self._forget(token)
+            return None
+        try:
+            user = self.lookup_user(claims["sub"])
+        except Exception:
+            user = None  # fail closed when the store is unreachable
+        if not user or user.get("username") != claims.get("name"):
+            self._forget(token)
+            return None
+        with self._lock:
+            self._cache[token] = (claims, min(claims["exp"], now + self.cache_ttl))
+            self._cache.move_to_end(token)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return claims
+
+    def _forget(self, token):
+        with self._lock:
+            self._cache.pop(token, None)
+
+    def revoke(self, token: str):
+        claims = decode_token(token, self.secret) if token else None
+        with self._lock:
+            self._cache.pop(token, None)
+            now = time.time()
+            for t in [t for t, exp in self._revoked.items() if exp < now]:
+                del self._revoked[t]
+            if claims:
+                self._revoked[token] = claims["exp"]
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def get_verifier():
+    global _verifier
+    with _verifier_lock:
+        if _verifier is None:
+            _verifier = TokenVerifier()
+        return _verifier
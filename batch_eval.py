@@ -0,0 +1,186 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# remedies generated during a batch run are not written to the shared remedy cache
+os.environ.setdefault("REMEDY_CACHE_PATH", ":memory:")
+
+from chat_engine import ChatEngine, new_session  # noqa: E402
+from llm_stub import RecordingCohereClient, ReplayCohereClient, StubCohereClient  # noqa: E402
+
+# ----------------------------
+# Offline batch runner: JSONL conversations through ChatEngine, with per-message results and latency percentiles
+# ----------------------------
+# Input: one JSON object per line. The conversation is "messages" (list of strings), or a single "message"
+# (also read from "text" or "body", so requests.jsonl-style files work). Optional expectations are
+# "disease" (last turn's predicted/served disease, "unknown" for none) and "route" (last turn's route).
+# Output: one JSON line per turn; a summary goes to stderr.
+QUEUE_PER_WORKER = 4  # conversations read ahead per worker, so large files are streamed
+
+
+def read_cases(path):
+    with (sys.stdin if path == "-" else open(path, "r", encoding="utf-8")) as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            messages = row.get("messages") or [row.get("message") or row.get("text") or row.get("body") or ""]
+            yield {
+                "id": row.get("id") or row.get("request_id") or n,
+                "messages": [str(m) for m in messages],
+                "disease": row.get("disease"),
+                "route": row.get("route"),
+            }
+
+
+def make_client(args):
+    if args.client == "stub":
+        return StubCohereClient(latency=args.latency)
+    if args.client == "replay":
+        return ReplayCohereClient(args.replay, latency=args.latency)
+    from llm import co
+
+    return RecordingCohereClient(co, args.record) if args.record else co
+
+
+def run_case(engine, case):
+    """Send every turn of one conversation; one result dict per turn."""
+    session, results = new_session(), []
+    for turn, message in enumerate(case["messages"]):
+        first = []
+
+        def on_chunk(_html):
+            if not first:
+                first.append(time.perf_counter())
+
+        started = time.perf_counter()
+        reply = engine.handle(session, message, on_chunk=on_chunk)
+        total = time.perf_counter() - started
+        fuzzy = engine.find_disease_fuzzy(message)
+        results.append({
+            "id": case["id"], "turn": turn, "message": message, "route": reply.route, "disease": reply.disease,
+            "fuzzy": fuzzy["name"] if fuzzy else None,
+            "ttfb_ms": round(((first[0] if first else started + total) - started) * 1e3, 3),
+            "ms": round(total * 1e3, 3),
+        })
+    last = results[-1]
+    if case["disease"] is not None:
+        last["expected_disease"] = case["disease"]
+        last["disease_ok"] = (last["disease"] or "unknown").lower() == case["disease"].lower()
+    if case["route"] is not None:
+        last["expected_route"] = case["route"]
+        last["route_ok"] = last["route"] == case["route"]
+    return results
+
+
+def run_batch(engine, cases, workers, out):
+    """Run conversations on a thread pool, writing results in input order; returns (results, wall seconds)."""
+    results, pending = [], deque()
+    started = time.perf_counter()
+
+    def drain(limit):
+        while len(pending) > limit:
+            for r in pending.popleft().result():
+                out.write(json.dumps(r, ensure_ascii=False) + "\n")
+                results.append(r)
+
+    with ThreadPoolExecutor(workers) as pool:
+        for case in cases:
+            pending.append(pool.submit(run_case, engine, case))
+            drain(workers * QUEUE_PER_WORKER)
+        drain(0)
+    out.flush()
+    return results, time.perf_counter() - started
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def latency_line(label, ms):
+    return (f"  {label:24s} n={len(ms):6d}  p50={statistics.median(ms):8.2f}  p95={percentile(ms, 0.95):8.2f}  "
+            f"p99={percentile(ms, 0.99):8.2f}  max={max(ms):8.2f} ms")
+
+
+def summarize(results, elapsed, workers, client):
+    """Aggregate numbers as a dict (also written to stderr)."""
+    ms = [r["ms"] for r in results]
+    routes = {}
+    for r in results:
+        routes.setdefault(r["route"], []).append(r["ms"])
+    disease_checks = [r["disease_ok"] for r in results if "disease_ok" in r]
+    route_checks = [r["route_ok"] for r in results if "route_ok" in r]
+    summary = {
+        "messages": len(results), "seconds": round(elapsed, 3), "workers": workers,
+        "throughput": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": statistics.median(ms) if ms else 0.0, "p95_ms": percentile(ms, 0.95) if ms else 0.0,
+        "p99_ms": percentile(ms, 0.99) if ms else 0.0,
+        "ttfb_p95_ms": percentile([r["ttfb_ms"] for r in results], 0.95) if ms else 0.0,
+        "routes": {route: len(v) for route, v in sorted(routes.items())},
+        "disease_accuracy": sum(disease_checks) / len(disease_checks) if disease_checks else None,
+        "route_accuracy": sum(route_checks) / len(route_checks) if route_checks else None,
+        "llm_calls": getattr(client, "calls", None),
+    }
+    print(f"{summary['messages']} messages in {elapsed:.2f} s ({summary['throughput']:.1f} msg/s, {workers} workers)", file=sys.stderr)
+    if ms:
+        print(latency_line("all", ms), file=sys.stderr)
+        for route, values in sorted(routes.items()):
+            print(latency_line(route, values), file=sys.stderr)
+    if disease_checks:
+        print(f"disease accuracy: {summary['disease_accuracy']:.1%} of {len(disease_checks)}", file=sys.stderr)
+    if route_checks:
+        print(f"route accuracy: {summary['route_accuracy']:.1%} of {len(route_checks)}", file=sys.stderr)
+    if summary["llm_calls"] is not None:
+        misses = getattr(client, "misses", None)
+        print(f"LLM calls: {summary['llm_calls']}" + (f" ({misses} not in the recording)" if misses is not None else ""), file=sys.stderr)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a JSONL file of messages through the chat engine offline")
+    parser.add_argument("input", help="JSONL file of conversations ('-' for stdin)")
+    parser.add_argument("--out", default="-", help="per-message JSONL results ('-' for stdout)")
+    parser.add_argument("--summary", default=None, help="also write the aggregate numbers as JSON here")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--client", choices=["stub", "replay", "cohere"], default="stub")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per stub/replay LLM call")
+    parser.add_argument("--replay", default=None, help="recording to answer from (--client replay)")
+    parser.add_argument("--record", default=None, help="append real Cohere prompts/answers here (--client cohere)")
+    parser.add_argument("--min-disease-accuracy", type=float, default=None, help="exit 1 below this fraction")
+    parser.add_argument("--max-p95-ms", type=float, default=None, help="exit 1 above this p95 latency")
+    args = parser.parse_args(argv)
+    if args.client == "replay" and not args.replay:
+        parser.error("--client replay needs --replay PATH")
+
+    client = make_client(args)
+    engine = ChatEngine(client=client)
+    engine.warm()
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    try:
+        results, elapsed = run_batch(engine, read_cases(args.input), args.workers, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    summary = summarize(results, elapsed, args.workers, client)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    failed = []
+    if args.min_disease_accuracy is not None and (summary["disease_accuracy"] or 0.0) < args.min_disease_accuracy:
+        failed.append(f"disease accuracy {summary['disease_accuracy'] or 0.0:.1%} < {args.min_disease_accuracy:.1%}")
+    if args.max_p95_ms is not None and summary["p95_ms"] > args.max_p95_ms:
+        failed.append(f"p95 {summary['p95_ms']:.2f} ms > {args.max_p95_ms:.2f} ms")
+    for reason in failed:
+        print(f"❌ {reason}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
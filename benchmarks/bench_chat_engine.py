@@ -0,0 +1,77 @@
+"""Throughput/latency of ChatEngine.handle() driven directly, without Streamlit or HTTP.
+
+Run from the project root:
+    python benchmarks/bench_chat_engine.py [--sessions 200] [--threads 8] [--latency 0.2]
+
+Each simulated session sends a symptom message and then a "both" follow-up.
+Cohere is replaced by llm_stub.StubCohereClient (`--latency` seconds per call)
+and remedies are cached in memory only.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("REMEDY_CACHE_PATH", ":memory:")
+
+from chat_engine import ChatEngine, new_session  # noqa: E402
+from llm_stub import StubCohereClient  # noqa: E402
+
+MESSAGES = [
+    "my head hurts badly on one side and light bothers me",
+    "I feel a bit off and tired today",
+    "medicine for fever",
+    "burning when I pee and I need to go often",
+    "doctor for migraine",
+    "Hi",
+    "I feel anxious",
+]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per stubbed Cohere call")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    engine = ChatEngine(client=StubCohereClient(latency=args.latency))
+    started = time.perf_counter()
+    engine.warm()
+    print(f"engine ready in {(time.perf_counter() - started) * 1e3:.1f} ms")
+
+    def run_session(i):
+        session, timings = new_session(), []
+        for message in (MESSAGES[i % len(MESSAGES)], "both"):
+            t0 = time.perf_counter()
+            reply = engine.handle(session, message)
+            timings.append((reply.route, time.perf_counter() - t0))
+        return timings
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        results = [t for timings in pool.map(run_session, range(args.sessions)) for t in timings]
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(results)} messages from {args.sessions} sessions in {elapsed:.2f} s "
+          f"({len(results) / elapsed:.1f} msg/s, {args.threads} threads, stub latency {args.latency * 1e3:.0f} ms)")
+    routes = {}
+    for route, seconds in results:
+        routes.setdefault(route, []).append(seconds * 1e3)
+    for route, ms in sorted(routes.items()):
+        print(f"  {route:24s} n={len(ms):5d}  p50={statistics.median(ms):8.2f} ms  p95={percentile(ms, 0.95):8.2f} ms  max={max(ms):8.2f} ms")
+    print(f"stub client calls: {engine.client.calls}")
+
+
+if __name__ == "__main__":
+    main()
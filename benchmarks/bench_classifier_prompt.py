@@ -0,0 +1,72 @@
+"""Classifier prompt size and build time as the disease catalog grows: full name list vs. budgeted shortlist.
+
+Run from the project root:
+    python benchmarks/bench_classifier_prompt.py [--sizes 140 1000 10000] [--budget 400]
+
+The catalog is the real knowledge base padded with synthetic disease names. For every message in
+benchmarks/symptom_eval.jsonl it reports estimated prompt tokens of the old prompt (every disease
+name) and of classifier_prompt.build_prompt, the local time to shortlist and build the prompt, and
+how often the expected disease is still offered to the model. LLM time to first token grows with
+the prompt tokens, so the token columns are the latency to watch.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_disease_index import synthetic_catalog  # noqa: E402
+from classifier_prompt import FOOTER, HEADER, build_prompt, estimate_tokens, shortlist  # noqa: E402
+from disease_index import DiseaseIndex  # noqa: E402
+from knowledge_base import load_knowledge_base  # noqa: E402
+from symptom_classifier import SymptomClassifier, load_intents  # noqa: E402
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[140, 500, 1000, 2500, 5000, 10000])
+    parser.add_argument("--budget", type=int, default=400, help="prompt token budget")
+    parser.add_argument("--eval", default=os.path.join(ROOT, "benchmarks", "symptom_eval.jsonl"))
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    real = [{"name": d["name"], "medicines": [], "doctors": []} for d in load_knowledge_base().disease_data]
+    pairs = load_intents()
+    with open(args.eval, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+
+    print(f"{'diseases':>8} {'full prompt tok':>15} {'budgeted tok p50/max':>21} {'build ms p50/p95':>17} {'answer offered':>15}")
+    for n in args.sizes:
+        taken = {d["name"].lower() for d in real}
+        padding = [d for d in synthetic_catalog(n + len(real)) if d["name"].lower() not in taken]
+        catalog = (real + padding)[:max(n, len(real))]
+        index = DiseaseIndex(catalog)
+        clf = SymptomClassifier(pairs, index)
+        names = [d["name"] for d in catalog]
+
+        full = estimate_tokens(HEADER + FOOTER) + estimate_tokens(", ".join(names))
+        tokens, ms, offered = [], [], []
+        for row in rows:
+            t0 = time.perf_counter()
+            candidates = shortlist(row["message"], clf.predict(row["message"]).candidates, index)
+            prompt = build_prompt(row["message"], candidates, budget=args.budget)
+            ms.append((time.perf_counter() - t0) * 1e3)
+            tokens.append(prompt.tokens)
+            if row["disease"] != "unknown":
+                offered.append(row["disease"] in prompt.codes.values())
+        print(f"{len(catalog):>8} {full + statistics.median(estimate_tokens(r['message']) for r in rows):>15.0f} "
+              f"{statistics.median(tokens):>12.0f} / {max(tokens):<6} {statistics.median(ms):>8.2f} / {percentile(ms, 0.95):<6.2f} "
+              f"{sum(offered) / len(offered):>15.1%}")
+
+
+if __name__ == "__main__":
+    main()
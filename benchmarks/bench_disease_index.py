@@ -0,0 +1,94 @@
+"""Disease lookup benchmark: DiseaseIndex vs. the old linear scan + difflib.
+
+Run from the project root:
+    python benchmarks/bench_disease_index.py [--sizes 140 10000 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from difflib import get_close_matches
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from disease_index import DiseaseIndex, normalize_to_base  # noqa: E402
+
+SYLLABLES = ["ar", "thri", "tis", "neu", "ro", "pa", "thy", "gas", "tro", "en", "ter", "itis", "my", "al", "gia",
+             "der", "ma", "car", "dio", "osis", "hep", "ato", "pul", "mon", "ary", "nal", "ne", "phr"]
+
+
+def synthetic_catalog(n, seed=7):
+    rng = random.Random(seed)
+    names, seen = [], set()
+    while len(names) < n:
+        words = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(rng.randint(1, 3))]
+        name = " ".join(w.capitalize() for w in words)
+        if name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(name)
+    return [{"name": name, "medicines": [], "doctors": []} for name in names]
+
+
+def typo(word, rng):
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:]
+
+
+def linear_exact(data, query):
+    q = normalize_to_base(query).strip().lower()
+    for d in data:
+        if d["name"].strip().lower() == q:
+            return d
+    return None
+
+
+def linear_fuzzy(data, names_lower, query):
+    q = normalize_to_base(query).strip().lower()
+    exact = linear_exact(data, q)
+    if exact:
+        return exact
+    matches = get_close_matches(q, names_lower, n=1, cutoff=0.6)
+    if matches:
+        return linear_exact(data, matches[0])
+    return None
+
+
+def timed(fn, queries):
+    started = time.perf_counter()
+    hits = sum(1 for q in queries if fn(q))
+    return (time.perf_counter() - started) / len(queries), hits
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[140, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--baseline-queries", type=int, default=20, help="difflib is slow on big catalogs")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    print(f"{'size':>8} {'build ms':>9} {'exact us':>9} {'linear exact us':>16} {'fuzzy us':>9} {'difflib fuzzy us':>17} {'fuzzy hit%':>10}")
+    for size in args.sizes:
+        data = synthetic_catalog(size)
+        names_lower = [d["name"].lower() for d in data]
+        started = time.perf_counter()
+        index = DiseaseIndex(data)
+        build = time.perf_counter() - started
+
+        sample = [rng.choice(data)["name"] for _ in range(args.queries)]
+        typos = [typo(name.lower(), rng) for name in sample]
+
+        exact_t, _ = timed(index.exact, sample)
+        lin_exact_t, _ = timed(lambda q: linear_exact(data, q), sample[:args.baseline_queries])
+        fuzzy_t, fuzzy_hits = timed(index.fuzzy, typos)
+        lin_fuzzy_t, _ = timed(lambda q: linear_fuzzy(data, names_lower, q), typos[:args.baseline_queries])
+
+        print(f"{size:>8} {build * 1e3:>9.1f} {exact_t * 1e6:>9.2f} {lin_exact_t * 1e6:>16.1f} "
+              f"{fuzzy_t * 1e6:>9.1f} {lin_fuzzy_t * 1e6:>17.1f} {100 * fuzzy_hits / len(typos):>9.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Knowledge-base load time and memory: json.load + normalize vs. the mmap snapshot (kb_snapshot.py).
+
+Run from the project root:
+    python benchmarks/bench_kb_snapshot.py [--scales 1 10 100]
+
+Synthetic catalogs repeat the real diseases (with numbered names) and their
+doctors. Every measurement runs in a fresh process; RSS is split into private
+(anonymous) memory and file-backed pages, which other workers mapping the same
+snapshot share.
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from kb_snapshot import build_snapshot  # noqa: E402
+from knowledge_base import find_json_file, normalize_records  # noqa: E402
+
+
+def rss():
+    """(anonymous, file-backed) resident KiB of this process."""
+    fields = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("RssAnon", "RssFile"):
+                fields[key] = int(value.split()[0])
+    return fields.get("RssAnon", 0), fields.get("RssFile", 0)
+
+
+def child(mode, path):
+    """Load `path` one way, touch every record, print a JSON result line."""
+    import gc
+
+    gc.collect()
+    anon0, file0 = rss()
+    started = time.perf_counter()
+    if mode == "json":
+        with open(path, "rb") as f:
+            records = normalize_records(json.loads(f.read().decode("utf-8")))
+        names = [d["name"] for d in records]
+    else:
+        from kb_snapshot import KnowledgeSnapshot
+
+        snap = KnowledgeSnapshot(path)
+        names = snap.names()
+        records = snap.records
+    ready = time.perf_counter() - started
+    doctors = sum(len(records[i]["doctors"]) for i in range(len(names)))
+    touched = time.perf_counter() - started
+    anon1, file1 = rss()
+    print(json.dumps({"ready_ms": ready * 1e3, "all_records_ms": touched * 1e3, "anon_kib": anon1 - anon0,
+                      "file_kib": file1 - file0, "diseases": len(names), "doctors": doctors}))
+
+
+def synthetic(records, scale):
+    out = []
+    for k in range(scale):
+        for d in records:
+            out.append({"tag": d["name"] if k == 0 else f"{d['name']} {k}", "medicines": d["medicines"], "doctor": d["doctors"]})
+    return {"intents": out}
+
+
+def run(mode, path):
+    result = subprocess.run([sys.executable, __file__, "--child", mode, path], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    os.chdir(ROOT)
+    with open(find_json_file(), "rb") as f:
+        base = normalize_records(json.loads(f.read().decode("utf-8")))
+
+    print(f"{'scale':>6} {'diseases':>9} {'mode':>9} {'file KiB':>9} {'ready ms':>9} {'all ms':>8} {'private KiB':>12} {'shared KiB':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            json_path = os.path.join(tmp, f"kb_{scale}.json")
+            snap_path = os.path.join(tmp, f"kb_{scale}.kbsnap")
+            data = json.dumps(synthetic(base, scale), ensure_ascii=False, indent=2).encode("utf-8")
+            with open(json_path, "wb") as f:
+                f.write(data)
+            started = time.perf_counter()
+            build_snapshot(normalize_records(json.loads(data)), hashlib.sha256(data).hexdigest(), snap_path)
+            build_ms = (time.perf_counter() - started) * 1e3
+            for mode, path in (("json", json_path), ("snapshot", snap_path)):
+                r = run(mode, path)
+                print(f"{scale:>6} {r['diseases']:>9} {mode:>9} {os.path.getsize(path) / 1024:>9.0f} {r['ready_ms']:>9.1f} "
+                      f"{r['all_records_ms']:>8.1f} {r['anon_kib']:>12} {r['file_kib']:>11}")
+            print(f"{'':>6} snapshot build: {build_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
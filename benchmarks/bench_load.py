@@ -0,0 +1,347 @@
+"""Load test: many simulated users driving one `streamlit run login.py` instance end to end.
+
+Run from the project root:
+    python benchmarks/bench_load.py [--users 40] [--concurrency 8] [--llm-latency 0.3]
+    python benchmarks/bench_load.py --save-baseline      # record benchmarks/load_baseline.json
+    python benchmarks/bench_load.py --check              # exit 1 when worse than the baseline
+
+Each user opens its own websocket session, as a browser tab would, and walks the real pages:
+sign up and log in (login.py against an in-memory MongoDB, mongomock), a symptom message,
+a "medicine" / "doctor" / "both" follow-up, and a Quick Lookup in the sidebar. Cohere is
+fake_cohere_server.py with `--llm-latency` seconds per call. Chat logs, sessions and the
+remedy cache go to a temporary folder.
+
+A step is timed from sending the message until Streamlit reports the script run finished, and
+it counts as an error when its expected text is missing. Server CPU time and RSS growth per
+session are read from /proc (Linux only).
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.proto.BackMsg_pb2 import BackMsg  # noqa: E402
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg  # noqa: E402
+from websockets.sync.client import connect  # noqa: E402
+
+from fake_cohere_server import start_fake_server  # noqa: E402
+
+SYMPTOMS = [
+    "my head hurts badly on one side and light bothers me",
+    "burning when I pee and I need to go often",
+    "I think I have a temperature and feel shivery",
+    "I feel a bit off and tired today",
+]
+FOLLOW_UPS = [("medicine", "Medicines for"), ("doctor", "Doctors for"), ("both", "Medicines for")]
+LOOKUPS = ["Fever", "Migraine", "Asthma", "Type 2 Diabetes"]
+STEPS = ["open", "signup", "login", "symptom", "followup", "lookup"]
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "load_baseline.json")
+# compared with --check; times and per-session costs may grow by --tolerance, throughput may drop by it
+CHECKED = ["sessions_per_s", "cpu_ms_per_session", "rss_kb_per_session"] + [f"{s}_p95_ms" for s in STEPS]
+ABS_SLACK = {"rss_kb_per_session": 256, "cpu_ms_per_session": 5}  # noise floor for small values
+ABS_SLACK.update({f"{s}_p95_ms": 10 for s in STEPS})
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Tab:
+    """One browser tab: a Streamlit websocket session that reruns the script with widget values."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.widgets = []  # (type, label, id) of the widgets in the last finished run
+        self.texts = []  # markdown / alert text of the last finished run
+        self.exceptions = []
+
+    def rerun(self, *states, timeout=60):
+        """Send widget states and read until the run (and any st.rerun() it triggers) finishes; returns seconds."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        msg.rerun_script.widget_states.widgets.extend(states)
+        started = time.perf_counter()
+        self.ws.send(msg.SerializeToString())
+        self.widgets, self.texts, self.exceptions = [], [], []
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(self.ws.recv(timeout=timeout))
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                self._collect(fwd.delta.new_element)
+            elif kind == "script_finished":
+                if fwd.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    self.widgets, self.texts, self.exceptions = [], [], []
+                    continue
+                return time.perf_counter() - started
+
+    def _collect(self, element):
+        kind = element.WhichOneof("type")
+        proto = getattr(element, kind)
+        if kind == "markdown":
+            self.texts.append(proto.body)
+        elif kind == "alert":
+            self.texts.append(proto.body)
+        elif kind == "exception":
+            self.exceptions.append(proto.message)
+        elif getattr(proto, "id", ""):
+            self.widgets.append((kind, getattr(proto, "label", ""), proto.id))
+
+    def widget(self, kind, label=None, nth=0):
+        ids = [wid for k, lab, wid in self.widgets if k == kind and (label is None or lab == label)]
+        if len(ids) <= nth:
+            raise LookupError(f"no {kind} {label or ''!r} on the page")
+        return ids[nth]
+
+    def saw(self, text):
+        return not self.exceptions and any(text in t for t in self.texts)
+
+
+def text_state(wid, value):
+    state = BackMsg().rerun_script.widget_states.widgets.add()
+    state.id, state.string_value = wid, value
+    return state
+
+
+def trigger_state(wid):
+    state = BackMsg().rerun_script.widget_states.widgets.add()
+    state.id, state.trigger_value = wid, True
+    return state
+
+
+def chat_state(wid, message):
+    state = BackMsg().rerun_script.widget_states.widgets.add()
+    state.id = wid
+    state.chat_input_value.data = message
+    return state
+
+
+def run_user(url, n):
+    """Walk one user through the app; returns [(step, seconds, ok)]."""
+    results = []
+    username, password = f"load{n}", "loadpass"
+
+    def step(name, expect, *states):
+        seconds = tab.rerun(*states)
+        results.append((name, seconds, tab.saw(expect)))
+
+    try:
+        ws = connect(url, subprotocols=["streamlit"], max_size=None)
+    except OSError as e:
+        print(f"user {n}: {e}", file=sys.stderr)
+        return [("open", 0.0, False)]
+    with ws:
+        tab = Tab(ws)
+        try:
+            _walk(tab, step, n, username, password)
+        except Exception as e:
+            results.append((STEPS[len(results)] if len(results) < len(STEPS) else "error", 0.0, False))
+            print(f"user {n}: {type(e).__name__}: {e}", file=sys.stderr)
+    return results
+
+
+def _walk(tab, step, n, username, password):
+    step("open", "Document Vault")
+    step("signup", "Registration successful", text_state(tab.widget("text_input", "Username", 1), username),
+         text_state(tab.widget("text_input", "Password", 1), password),
+         text_state(tab.widget("text_input", "Confirm Password"), password),
+         trigger_state(tab.widget("button", "📝 Sign Up")))
+    step("login", "chat-box", text_state(tab.widget("text_input", "Username"), username),
+         text_state(tab.widget("text_input", "Password"), password), trigger_state(tab.widget("button", "🔐 Login")))
+    step("symptom", "Predicted Condition", chat_state(tab.widget("chat_input"), SYMPTOMS[n % len(SYMPTOMS)]))
+    follow_up, expect = FOLLOW_UPS[n % len(FOLLOW_UPS)]
+    step("followup", expect, chat_state(tab.widget("chat_input"), follow_up))
+    disease = LOOKUPS[n % len(LOOKUPS)]
+    step("lookup", f"**{disease}", text_state(tab.widget("selectbox", "Search disease"), disease))
+
+
+class ProcessStats:
+    """CPU seconds and resident memory of a process, from /proc (None elsewhere)."""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    def cpu_seconds(self):
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            return None
+        return (int(fields[11]) + int(fields[12])) / self.ticks  # utime + stime
+
+    def memory_kb(self, field="VmRSS"):
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith(field + ":"):
+                        return int(line.split()[1])
+        except OSError:
+            return None
+        return None
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def start_app(port, env):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "login.py", "--server.headless", "true",
+         "--server.port", str(port), "--server.enableXsrfProtection", "false", "--server.fileWatcherType", "none"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    started = time.perf_counter()
+    while time.perf_counter() - started < 60:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as r:
+                if r.status == 200:
+                    return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("streamlit server did not come up")
+
+
+def summarize(results, elapsed, users, cpu, rss):
+    steps = {}
+    for name, seconds, ok in results:
+        steps.setdefault(name, []).append((seconds * 1e3, ok))
+    summary = {
+        "users": users, "seconds": round(elapsed, 3), "sessions_per_s": round(users / elapsed, 3),
+        "steps_per_s": round(len(results) / elapsed, 3), "errors": sum(1 for _, _, ok in results if not ok),
+        "cpu_ms_per_session": round(cpu * 1e3 / users, 3) if cpu is not None else None,
+        "rss_kb_per_session": round(rss / users, 3) if rss is not None else None,
+    }
+    for name in STEPS:
+        ms = [m for m, _ in steps.get(name, [])]
+        if ms:
+            summary[f"{name}_p50_ms"] = round(statistics.median(ms), 3)
+            summary[f"{name}_p95_ms"] = round(percentile(ms, 0.95), 3)
+            summary[f"{name}_p99_ms"] = round(percentile(ms, 0.99), 3)
+            summary[f"{name}_errors"] = sum(1 for _, ok in steps[name] if not ok)
+    return summary
+
+
+def compare(summary, baseline, tolerance):
+    """Regressions against the baseline, as readable strings."""
+    failed = []
+    for key in CHECKED:
+        old, new = baseline.get(key), summary.get(key)
+        if old is None or new is None:
+            continue
+        if key == "sessions_per_s":
+            if new < old * (1 - tolerance):
+                failed.append(f"{key}: {new:.2f} < {old:.2f}")
+        elif new > old * (1 + tolerance) + ABS_SLACK.get(key, 0):
+            failed.append(f"{key}: {new:.1f} > {old:.1f}")
+    if summary["errors"] > baseline.get("errors", 0):
+        failed.append(f"errors: {summary['errors']} > {baseline.get('errors', 0)}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=40, help="simulated sessions (after one warm-up user)")
+    parser.add_argument("--concurrency", type=int, default=8, help="sessions running at the same time")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per fake Cohere call")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write this run's numbers to --baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 when worse than --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed relative regression for --check")
+    parser.add_argument("--summary", default=None, help="also write this run's numbers as JSON here")
+    args = parser.parse_args()
+
+    fake = start_fake_server(latency=args.llm_latency)
+    tmp = tempfile.TemporaryDirectory(prefix="bench_load_")
+    env = dict(
+        os.environ, MONGO_URI="mongomock://localhost", COHERE_BASE_URL=fake.url,
+        SESSION_STORE_URL=f"sqlite:///{os.path.join(tmp.name, 'sessions.sqlite3')}",
+        REMEDY_CACHE_PATH=os.path.join(tmp.name, "remedy_cache.sqlite3"),
+        CONVERSATIONS_DIR=os.path.join(tmp.name, "conversations"),
+        REGISTER_ATTEMPTS=str(10 ** 6),  # every simulated user signs up from 127.0.0.1
+    )
+    port = free_port()
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    proc = start_app(port, env)
+    stats = ProcessStats(proc.pid)
+    try:
+        warm = run_user(url, 0)  # loads the knowledge base, engine and pages
+        print("warm-up user: " + ", ".join(f"{name} {s * 1e3:.0f} ms" for name, s, _ in warm))
+        cpu0, rss0 = stats.cpu_seconds(), stats.memory_kb()
+        calls0 = fake.requests
+        lock, results = threading.Lock(), []
+
+        def one(n):
+            r = run_user(url, n)
+            with lock:
+                results.extend(r)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            list(pool.map(one, range(1, args.users + 1)))
+        elapsed = time.perf_counter() - started
+        cpu1, rss1, peak = stats.cpu_seconds(), stats.memory_kb(), stats.memory_kb("VmHWM")
+    finally:
+        proc.terminate()
+        proc.wait()
+        fake.shutdown()
+        tmp.cleanup()
+
+    summary = summarize(results, elapsed, args.users,
+                        cpu1 - cpu0 if cpu0 is not None and cpu1 is not None else None,
+                        rss1 - rss0 if rss0 is not None and rss1 is not None else None)
+    summary.update({"concurrency": args.concurrency, "llm_latency": args.llm_latency, "llm_calls": fake.requests - calls0,
+                    "peak_rss_kb": peak})
+
+    print(f"{args.users} users ({args.concurrency} at a time, LLM {args.llm_latency * 1e3:.0f} ms) in {elapsed:.2f} s: "
+          f"{summary['sessions_per_s']:.2f} sessions/s, {summary['steps_per_s']:.1f} steps/s, "
+          f"{summary['errors']} errors, {summary['llm_calls']} LLM calls")
+    for name in STEPS:
+        if f"{name}_p50_ms" in summary:
+            print(f"  {name:9s} p50={summary[f'{name}_p50_ms']:8.1f}  p95={summary[f'{name}_p95_ms']:8.1f}  "
+                  f"p99={summary[f'{name}_p99_ms']:8.1f} ms  errors={summary[f'{name}_errors']}")
+    if summary["cpu_ms_per_session"] is not None:
+        print(f"server: {summary['cpu_ms_per_session']:.1f} ms CPU and {summary['rss_kb_per_session']:.0f} KB RSS growth "
+              f"per session, peak RSS {peak / 1024:.0f} MB")
+
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"no baseline at {args.baseline} (run with --save-baseline first)", file=sys.stderr)
+            return 1
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if (baseline.get("concurrency"), baseline.get("llm_latency")) != (args.concurrency, args.llm_latency):
+            print("⚠️ baseline was recorded with a different --concurrency / --llm-latency", file=sys.stderr)
+        failed = compare(summary, baseline, args.tolerance)
+        for reason in failed:
+            print(f"❌ {reason}", file=sys.stderr)
+        return 1 if failed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
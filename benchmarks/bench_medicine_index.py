@@ -0,0 +1,91 @@
+"""Recall and latency of the medicine FAQ index (medicine_index.py), float32 vs. int8.
+
+Run from the project root:
+    python benchmarks/bench_medicine_index.py [--eval benchmarks/medicine_eval.jsonl] [--scales 1 10 100]
+
+Each line of the eval file is {"message": ..., "tag": ...}; use "unknown" for
+messages that should not be answered from medicine.json. Scaled runs repeat
+every intent (with numbered tags) to show how search latency, index size and
+load time grow with the number of patterns.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from medicine_index import MEDICINE_THRESHOLD, MedicineIndex, MedicineIntent, load_medicine_intents  # noqa: E402
+
+DTYPES = ["float32", "int8"]
+
+
+def percentile(values, q):
+    return sorted(values)[max(int(q * len(values)) - 1, 0)]
+
+
+def evaluate(index, rows, threshold):
+    timings, hits1, hits3, answered, correct = [], 0, 0, 0, 0
+    for row in rows:
+        t0 = time.perf_counter()
+        top = index.top_k(row["message"], 3)
+        timings.append(time.perf_counter() - t0)
+        tags = [m.intent.tag.split("#")[0] for m in top]
+        if row["tag"] != "unknown":
+            hits1 += tags[:1] == [row["tag"]]
+            hits3 += row["tag"] in tags
+        if top and top[0].score >= threshold:
+            answered += 1
+            correct += tags[0] == row["tag"]
+    labelled = sum(1 for row in rows if row["tag"] != "unknown")
+    return {
+        "top1": hits1 / labelled, "recall3": hits3 / labelled,
+        "precision": correct / answered if answered else 0.0, "answered": answered / len(rows),
+        "p50_us": statistics.median(timings) * 1e6, "p95_us": percentile(timings, 0.95) * 1e6,
+    }
+
+
+def scaled(intents, scale):
+    return [MedicineIntent(f"{i.tag}#{k}" if k else i.tag, [f"{p} {k}" if k else p for p in i.patterns], i.responses)
+            for k in range(scale) for i in intents]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--eval", default=os.path.join(ROOT, "benchmarks", "medicine_eval.jsonl"))
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--threshold", type=float, default=MEDICINE_THRESHOLD)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    intents = load_medicine_intents()
+    with open(args.eval, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+
+    print(f"eval: {len(rows)} messages, threshold {args.threshold}")
+    print(f"{'scale':>6} {'patterns':>9} {'dtype':>8} {'build ms':>9} {'load ms':>8} {'file KiB':>9} "
+          f"{'top1':>6} {'recall@3':>9} {'precision':>10} {'answered':>9} {'p50 us':>7} {'p95 us':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            corpus = scaled(intents, scale)
+            for dtype in DTYPES:
+                started = time.perf_counter()
+                index = MedicineIndex(corpus, dtype=dtype)
+                build_ms = (time.perf_counter() - started) * 1e3
+                path = os.path.join(tmp, f"medicine_{scale}_{dtype}.npz")
+                index.save(path)
+                started = time.perf_counter()
+                index = MedicineIndex.load(path)
+                load_ms = (time.perf_counter() - started) * 1e3
+                r = evaluate(index, rows, args.threshold)
+                print(f"{scale:>6} {len(index.labels):>9} {dtype:>8} {build_ms:>9.1f} {load_ms:>8.1f} "
+                      f"{os.path.getsize(path) / 1024:>9.0f} {r['top1']:>6.1%} {r['recall3']:>9.1%} "
+                      f"{r['precision']:>10.1%} {r['answered']:>9.1%} {r['p50_us']:>7.0f} {r['p95_us']:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
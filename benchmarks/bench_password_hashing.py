@@ -0,0 +1,53 @@
+"""Login (bcrypt check) throughput per core with db_users' bounded hashing.
+
+Run from the project root:
+    python benchmarks/bench_password_hashing.py [--rounds 10 12] [--logins 64]
+
+Simulates a burst of concurrent logins from many script threads; each login
+hashes on its own thread and HASH_WORKERS bounds how many hashes run at once.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bcrypt  # noqa: E402
+
+import db_users  # noqa: E402
+
+
+def burst(hashed, logins, clients):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as sessions:
+        results = list(sessions.map(lambda _: db_users.check_password("correct horse", hashed), range(logins)))
+    assert all(results)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 12])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--clients", type=int, default=32, help="concurrent login sessions")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    print(f"cores={cores} hash workers={db_users.HASH_WORKERS} clients={args.clients}")
+    print(f"{'rounds':>6} {'inline logins/s':>16} {'pooled logins/s':>16} {'per worker':>11} {'ms/login':>9}")
+    for rounds in args.rounds:
+        hashed = bcrypt.hashpw(b"correct horse", bcrypt.gensalt(rounds=rounds))
+        n_inline = max(args.logins // 8, 2)
+        started = time.perf_counter()
+        for _ in range(n_inline):
+            bcrypt.checkpw(b"correct horse", hashed)
+        inline = n_inline / (time.perf_counter() - started)
+        pooled = args.logins / burst(hashed, args.logins, args.clients)
+        workers = min(db_users.HASH_WORKERS, cores)
+        print(f"{rounds:>6} {inline:>16.1f} {pooled:>16.1f} {pooled / workers:>11.1f} {1000 / inline:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Chat latency and answers while the LLM is healthy, slow, failing and recovering (local fake Cohere server).
+
+Run from the project root:
+    python benchmarks/bench_resilience.py [--messages 40] [--threads 8] [--deadline 2]
+
+The real cohere SDK talks HTTP to fake_cohere_server.py through resilient_client.ResilientClient,
+so timeouts, retries and the circuit breaker run exactly as in production. Remedies are cached in
+memory only, and each scenario starts with an empty cache.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("REMEDY_CACHE_PATH", ":memory:")
+
+import cohere  # noqa: E402
+
+import remedy_cache  # noqa: E402
+from chat_engine import ChatEngine, new_session  # noqa: E402
+from fake_cohere_server import set_behaviour, start_fake_server  # noqa: E402
+from orchestrator import CallOrchestrator  # noqa: E402
+from resilient_client import CircuitBreaker, ResilientClient  # noqa: E402
+
+# messages the local classifier can't place, so each one needs the LLM classifier
+MESSAGES = [
+    "I feel a bit off and tired today",
+    "something is not right with my body",
+    "I have a strange feeling in my chest and arms",
+    "my skin looks different lately",
+]
+
+SCENARIOS = [
+    ("healthy", {}),
+    ("slow (latency > deadline)", {"latency": 5.0}),
+    ("down (HTTP 503)", {"error_rate": 1.0, "status": 503}),
+    ("flaky (30% 503)", {"error_rate": 0.3, "status": 503}),
+    ("recovered", {}),
+]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=40, help="messages per scenario")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--deadline", type=float, default=2.0, help="seconds per LLM call, retries included")
+    parser.add_argument("--cooldown", type=float, default=1.0, help="seconds the circuit stays open")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake server latency when healthy")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    server = start_fake_server(latency=args.latency)
+    raw = cohere.Client("fake-key", base_url=server.url, timeout=30, max_retries=0)
+    client = ResilientClient(raw, deadline=args.deadline, retries=2, backoff=0.1)
+    engine = ChatEngine(client=client, orchestrator=CallOrchestrator(timeout=args.deadline + 1))
+    engine.warm()
+
+    def one(i):
+        t0 = time.perf_counter()
+        reply = engine.handle(new_session(), MESSAGES[i % len(MESSAGES)])
+        return reply.route, time.perf_counter() - t0
+
+    print(f"{'scenario':28s} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'HTTP calls':>10} {'circuit':>9}  routes")
+    for name, behaviour in SCENARIOS:
+        set_behaviour(server, **dict({"latency": args.latency, "error_rate": 0.0, "status": 503}, **behaviour))
+        remedy_cache._remedy_cache = None  # fresh in-memory cache: every remedy needs the LLM
+        if name == "recovered":
+            time.sleep(args.cooldown)  # the breaker left open by the failures lets a trial call through
+        else:
+            client.breaker = CircuitBreaker(failures=5, cooldown=args.cooldown)
+        before = server.requests
+        with ThreadPoolExecutor(args.threads) as pool:
+            results = list(pool.map(one, range(args.messages)))
+        ms = [s * 1e3 for _, s in results]
+        routes = Counter(route for route, _ in results)
+        print(f"{name:28s} {statistics.median(ms):>8.0f} {percentile(ms, 0.95):>8.0f} {max(ms):>8.0f} "
+              f"{server.requests - before:>10} {client.breaker.state:>9}  {dict(routes)}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare reaching the chat by page switch (single process) with cold-starting a second server.
+
+Run from the project root:
+    python benchmarks/bench_startup.py [--runs 3]
+
+* page switch: login.py driven through streamlit's AppTest against an in-memory
+  MongoDB (mongomock); reports the login -> chat render time recorded in metrics.
+* cold start: what the old os.system("streamlit run app.py") launcher paid per
+  login, measured until the new server answers /_stcore/health (before any
+  script has even run).
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("MONGO_URI", "mongomock://localhost")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def cold_start():
+    port = free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "app.py", "--server.headless", "true", "--server.port", str(port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < 60:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as r:
+                    if r.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError("streamlit server did not come up")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def page_switch(run):
+    from streamlit.testing.v1 import AppTest
+
+    import metrics
+
+    at = AppTest.from_file(os.path.join(ROOT, "login.py"), default_timeout=60)
+    at.run()
+    username, password = f"bench{run}", "benchpass"
+    at.text_input[2].input(username)
+    at.text_input[3].input(password)
+    at.text_input[4].input(password)
+    at.button[1].click().run()
+    at.text_input[0].input(username)
+    at.text_input[1].input(password)
+    at.button[0].click().run()
+    return metrics.recent_timings("login_to_chat")[-1]["seconds"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    os.chdir(ROOT)
+
+    switches = [page_switch(i) for i in range(args.runs)]
+    import metrics
+    print(f"startup events (s since process start): {metrics.startup_events()}")
+    print(f"page switch login -> chat: median {statistics.median(switches) * 1e3:.0f} ms (first {switches[0] * 1e3:.0f} ms)")
+    colds = [cold_start() for _ in range(args.runs)]
+    print(f"cold start of a second server (health only): median {statistics.median(colds) * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
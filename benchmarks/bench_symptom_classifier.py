@@ -0,0 +1,60 @@
+"""Accuracy/latency of the local symptom classifier on a labelled message set.
+
+Run from the project root:
+    python benchmarks/bench_symptom_classifier.py [--eval benchmarks/symptom_eval.jsonl] [--thresholds 0.4 0.5 0.6]
+
+Each line of the eval file is {"message": ..., "disease": ...}; use "unknown" for
+messages that should not be answered locally.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from knowledge_base import load_knowledge_base  # noqa: E402
+from symptom_classifier import TOP_K, SymptomClassifier  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--eval", default=os.path.join(ROOT, "benchmarks", "symptom_eval.jsonl"))
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.3, 0.4, 0.5, 0.6])
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    kb = load_knowledge_base()
+    started = time.perf_counter()
+    clf = SymptomClassifier.from_files(kb.index)
+    print(f"built classifier: {len(clf.diseases)} diseases, {clf.matrix.shape[0]} patterns in {(time.perf_counter() - started) * 1e3:.1f} ms")
+
+    with open(args.eval, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+
+    timings, results = [], []
+    for row in rows:
+        t0 = time.perf_counter()
+        pred = clf.predict(row["message"], threshold=0.0)
+        timings.append(time.perf_counter() - t0)
+        results.append((row, pred))
+
+    labelled = [(row, pred) for row, pred in results if row["disease"] != "unknown"]
+    recall_k = sum(1 for row, pred in labelled if row["disease"] in pred.candidates) / len(labelled)
+    top1 = sum(1 for row, pred in labelled if pred.candidates[:1] == [row["disease"]]) / len(labelled)
+    print(f"messages={len(rows)} top1={top1:.1%} recall@{TOP_K}={recall_k:.1%}")
+    print(f"latency p50={statistics.median(timings) * 1e6:.0f}us p95={sorted(timings)[int(0.95 * len(timings)) - 1] * 1e6:.0f}us")
+
+    print(f"{'threshold':>9} {'answered locally':>17} {'local precision':>16} {'sent to LLM':>12}")
+    for th in args.thresholds:
+        answered = [(row, pred) for row, pred in results if pred.score >= th]
+        correct = sum(1 for row, pred in answered if pred.candidates[0] == row["disease"])
+        precision = correct / len(answered) if answered else 0.0
+        print(f"{th:>9.2f} {len(answered) / len(rows):>16.1%} {precision:>16.1%} {1 - len(answered) / len(rows):>11.1%}")
+
+
+if __name__ == "__main__":
+    main()
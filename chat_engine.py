@@ -0,0 +1,423 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+
+import metrics
+import tracing
+from classifier_prompt import build_prompt, parse_answer, shortlist
+from disease_index import aliases_for, normalize_to_base
+from doctor_directory import DoctorDirectory
+from keyword_matcher import KeywordMatcher
+from knowledge_base import load_knowledge_base
+from llm import cached_remedies, llm_available, prefetch_remedies, stream_first_line, stream_remedies
+from medicine_index import MedicineIndex, load_medicine_index
+from mental_chat import DEFAULT_ESCALATION, ESCALATION_DISEASES, MentalChat
+from orchestrator import get_orchestrator
+from resilient_client import LLMUnavailable
+from symptom_classifier import SymptomClassifier
+from text_vectors import tokenize
+from tracing import span, traced_iter
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Headless chat engine: message routing with no UI or framework dependency
+# ----------------------------
+# Used by the Streamlit page (app.py) and the HTTP endpoint (api.py). All per-user state lives in
+# the `session` mapping passed to handle(), so any worker can serve any session.
+
+# Intent keywords (Option A rules)
+MED_KEYWORDS = ["medicine", "medicines", "tablet", "tablets", "dose", "treatment", "drug", "meds"]
+DOC_KEYWORDS = ["doctor", "doctors", "specialist", "hospital", "clinic", "consult", "see a doctor"]
+BOTH_KEYWORDS = ["both", "both please", "medicine and doctor", "medicine & doctor", "medicines and doctors"]
+
+INTENT_KEYWORDS = {"med": MED_KEYWORDS, "doc": DOC_KEYWORDS, "both": BOTH_KEYWORDS}
+INTENT_WORDS = {w for keywords in INTENT_KEYWORDS.values() for k in keywords for w in tokenize(k)}
+
+Reply = namedtuple("Reply", ["html", "route", "disease"])
+
+
+def new_session():
+    return {"messages": [], "pending_disease": None, "offered_disease": None}
+
+
+def build_intent_matcher(disease_names):
+    """One automaton for disease names + intent keywords."""
+    matcher = KeywordMatcher()
+    for label, keywords in INTENT_KEYWORDS.items():
+        for k in keywords:
+            matcher.add(k, label)
+    for name in disease_names:
+        for alias in aliases_for(name):
+            matcher.add(alias, "disease", name)
+    return matcher.build()
+
+
+def reply_kind(wants_med: bool, wants_doc: bool, wants_both: bool) -> str:
+    """"med", "doc" or "both" (also when both medicines and doctors are asked for)."""
+    if wants_med and not wants_doc and not wants_both:
+        return "med"
+    if wants_doc and not wants_med and not wants_both:
+        return "doc"
+    return "both"
+
+
+class ChatEngine:
+    """Turns one user message into a reply.
+
+    handle() reads and updates `session["messages"]`, `session["pending_disease"]` (the
+    medicine/doctor/both question was asked) and `session["offered_disease"]` (doctors
+    were offered alongside a conversational answer; only an explicit "doctor" takes it
+    up) in a plain dict, st.session_state, or anything loaded from a session store. The
+    keyword matcher and symptom classifier are shared and rebuilt when the knowledge
+    base changes. `client` replaces the Cohere client (e.g. a stub for benchmarks).
+    """
+
+    def __init__(self, kb=None, client=None, orchestrator=None):
+        self._kb = kb
+        self.client = client
+        self.orchestrator = orchestrator or get_orchestrator()
+        self._lock = threading.Lock()
+        self._digest = None
+        self.intent_matcher = None
+        self.symptom_classifier = None
+        self.mental_chat = self._load_mental_chat()
+        self.medicine_index = self._load_medicine_index()
+
+    @staticmethod
+    def _load_mental_chat():
+        try:
+            return MentalChat.from_files()
+        except ValueError as e:
+            logger.warning("Conversational intents disabled: %s", e)
+            return MentalChat([])
+
+    @staticmethod
+    def _load_medicine_index():
+        try:
+            return load_medicine_index()
+        except ValueError as e:
+            logger.warning("Medicine FAQ answers disabled: %s", e)
+            return MedicineIndex([])
+
+    @property
+    def kb(self):
+        if self._kb is not None:
+            self._kb.refresh()
+            return self._kb
+        return load_knowledge_base()
+
+    def _resources(self):
+        kb = self.kb
+        if kb.digest != self._digest:
+            with self._lock:
+                if kb.digest != self._digest:
+                    with span("build_indexes"):
+                        self._build_indexes(kb)
+        return kb
+
+    def _build_indexes(self, kb):
+        self.intent_matcher = build_intent_matcher(kb.disease_names)
+        self.symptom_classifier = SymptomClassifier.from_files(kb.index)
+        if kb.snapshot is not None:
+            # index the snapshot's doctor columns rather than decoding every disease record
+            self._directory = DoctorDirectory.from_snapshot(kb.snapshot)
+        else:
+            self._directory = DoctorDirectory(kb.disease_data, kb.disease_names)
+        self._digest = kb.digest
+
+    @property
+    def directory(self):
+        """Doctor directory (and pre-rendered reply fragments) for the current knowledge base."""
+        self._resources()
+        return self._directory
+
+    def warm(self):
+        """Build the matcher and classifier now rather than on the first message."""
+        self._resources()
+
+    # ----------------------------
+    # Lookups
+    # ----------------------------
+    def find_disease_exact(self, query: str):
+        return self.kb.index.exact(query)
+
+    @span("fuzzy_match")
+    def find_disease_fuzzy(self, query: str):
+        return self.kb.index.fuzzy(query)
+
+    # Cohere classifier over a shortlist of candidate diseases (listed as codes within the prompt token budget):
+    # returns base disease name, 'unknown', or None when Cohere could not be reached
+    @span("classify_llm")
+    def classify_with_cohere(self, symptoms: str, candidates):
+        prompt = build_prompt(symptoms, candidates)
+        if prompt.truncated:
+            metrics.increment("classify_prompts_truncated_total")
+        try:
+            predicted = stream_first_line(prompt.text, client=self.client, temperature=0.15, max_tokens=10).strip('"').strip()
+            name = parse_answer(predicted, prompt.codes)
+            if name:
+                return name
+            # no code in the answer: normalize and try to match a disease name
+            match = self.find_disease_exact(normalize_to_base(predicted))
+            if match:
+                return match["name"]
+            # if the returned predicted is exactly a disease in DB, return
+            fuzzy = self.find_disease_fuzzy(predicted)
+            return fuzzy["name"] if fuzzy else "unknown"
+        except LLMUnavailable:
+            return None
+        except Exception as e:
+            metrics.record_error("classify", e)
+            return None
+
+    # Cohere-based prediction (conservative): returns base disease name, 'unknown', or None without Cohere
+    @span("predict_disease")
+    def predict_disease_from_symptoms(self, symptoms: str, on_shortlist=None, local_pred=None):
+        kb = self._resources()
+        # If user typed a single token that exactly matches base disease, return it
+        tokens = [t for t in symptoms.strip().split() if t.strip()]
+        if len(tokens) == 1:
+            local = kb.index.exact(tokens[0])
+            if local:
+                return local["name"]
+        # Local fast path: answer without the LLM when our own patterns are confident
+        local_pred = local_pred or self.symptom_classifier.predict(symptoms)
+        if local_pred.disease:
+            return local_pred.disease
+        # Cohere circuit open: don't wait for a call that will fail (the caller offers the local shortlist)
+        if not llm_available(self.client):
+            return None
+        # Ask Cohere to classify, offering only the local shortlist
+        candidates = shortlist(symptoms, local_pred.candidates, kb.index)
+        if not candidates:
+            return "unknown"
+        if on_shortlist:
+            on_shortlist(candidates)
+        return self.orchestrator.run("classify", self.classify_with_cohere, symptoms, candidates, default=None)
+
+    # Speculative remedies: start generating for the top local candidate while Cohere classifies
+    def remedy_prefetcher(self, prefetch: dict):
+        def start(candidates):
+            if candidates:
+                prefetch[candidates[0]] = self.orchestrator.submit("remedies", prefetch_remedies, candidates[0], self.client)
+        return start
+
+    def settle_prefetch(self, prefetch: dict, disease_name: str):
+        """Wait for the speculative call if it guessed right (so streaming hits the cache); drop the rest."""
+        for name, future in prefetch.items():
+            if name == disease_name:
+                self.orchestrator.wait(future)
+            else:
+                self.orchestrator.discard(future)
+
+    # ----------------------------
+    # Reply builders
+    # ----------------------------
+    def symptom_reply_parts(self, disease_name: str):
+        head = f"<b>🤖 Predicted Condition: {disease_name}</b><br><br><b>🌿 Remedies:</b><br>"
+        yield head
+        remedies_html = ""
+        for remedies_html in traced_iter("remedies", stream_remedies(disease_name, client=self.client)):
+            yield head + remedies_html
+        yield f"{head}{remedies_html}<br><br>Would you like <b>medicine</b>, <b>doctor</b>, or <b>both</b>?"
+
+    @span("render_reply")
+    def followup_reply(self, disease_name: str, wants_med: bool, wants_doc: bool, wants_both: bool):
+        record = self.find_disease_exact(disease_name)
+        if not record:
+            return "Sorry — couldn't find disease details. Try again."
+        if not (wants_med or wants_doc or wants_both):
+            return "Please type <b>medicine</b>, <b>doctor</b>, or <b>both</b> (or include the disease name)."
+        return self.directory.reply(record["name"], reply_kind(wants_med, wants_doc, wants_both))
+
+    @span("render_reply")
+    def keyword_reply(self, disease_name: str, wants_med: bool, wants_doc: bool, wants_both: bool):
+        rec = self.find_disease_exact(disease_name)
+        if not rec:
+            return "Couldn't find that disease in our database."
+        return self.directory.reply(rec["name"], reply_kind(wants_med, wants_doc, wants_both))
+
+    @span("render_reply")
+    def mental_chat_reply(self, session, intent):
+        """Local answer for a conversational intent; escalate_to_doctor offers doctors for a related condition."""
+        html = self.mental_chat.respond(intent)
+        if intent.escalate:
+            record = self.find_disease_exact(ESCALATION_DISEASES.get(intent.category, DEFAULT_ESCALATION))
+            if record:
+                session["offered_disease"] = record["name"]
+                html += ("<br><br>🩺 Talking to a doctor or mental health professional could really help. "
+                         f"Type <b>doctor</b> to see specialists for {record['name']}.")
+            else:
+                html += "<br><br>🩺 Talking to a doctor or mental health professional could really help."
+        return html
+
+    @span("render_reply")
+    def degraded_reply(self, candidates):
+        """Local-only answer while Cohere is unavailable: the closest diseases from the symptom patterns,
+        with the medicines, doctors and any cached remedies of the closest one."""
+        html = "⚠️ Our AI assistant is temporarily unavailable, so I can only use the local database right now."
+        if candidates:
+            names = ", ".join(f"<b>{c}</b>" for c in candidates[:3])
+            html += f"<br><br>Closest matches for your symptoms: {names}."
+            top = candidates[0]
+            remedies = cached_remedies(top)
+            if remedies:
+                html += f"<br><br><b>🌿 Remedies for {top}:</b><br>{remedies}"
+            details = self.directory.reply(top, "both")
+            if details:
+                html += f"<br><br>{details}"
+            if len(candidates) > 1:
+                html += "<br><br>Type another of these names to see its medicines and doctors."
+        else:
+            html += "<br><br>Type a disease name (e.g. <b>fever</b>) to see its medicines and doctors."
+        return html
+
+    # ----------------------------
+    # Routing
+    # ----------------------------
+    def _route(self, session, u: str):
+        """(reply parts, route, disease) for one message; updates pending_disease / offered_disease."""
+        kb = self._resources()
+        # single pass over the message: {"med"|"doc"|"both"|"disease": [...]}; a named hospital
+        # ("MGM hospital") is a place, not a request for doctors, so directory phrases are left out
+        with span("intent_scan"):
+            doctor_query = self._directory.query(u)
+            hits = self.intent_matcher.scan(doctor_query.rest if doctor_query else u)
+        wants_med, wants_doc, wants_both = "med" in hits, "doc" in hits, "both" in hits
+
+        # 0) Self-harm / suicidal messages get crisis support first, whatever else is pending
+        offered, session["offered_disease"] = session.get("offered_disease"), None
+        crisis = self.mental_chat.crisis(u)
+        if crisis:
+            session["pending_disease"] = None
+            return [self.mental_chat_reply(session, crisis)], "crisis", session.get("offered_disease")
+
+        # a doctor offer made with a conversational answer is only taken up by an explicit choice
+        # ("doctor"); anything else is routed as a new message
+        if offered and (wants_med or wants_doc or wants_both) and "disease" not in hits:
+            session["pending_disease"] = None
+            return [self.followup_reply(offered, wants_med, wants_doc, wants_both)], "followup", offered
+
+        # 1) If pending_disease exists, interpret user input as follow-up choice
+        pending = session.get("pending_disease")
+        if pending:
+            session["pending_disease"] = None
+            # a conversational message instead of a choice (e.g. after a doctor offer) is answered, not re-prompted
+            chat = None if (wants_med or wants_doc or wants_both) else self.mental_chat.match(u)
+            if chat:
+                return [self.mental_chat_reply(session, chat.intent)], "mental_chat", session.get("offered_disease")
+            return [self.followup_reply(pending, wants_med, wants_doc, wants_both)], "followup", pending
+
+        # 2) If message explicitly asks for medicine/doctor/both and includes disease name -> serve without prediction
+        if wants_med or wants_doc or wants_both:
+            found = hits["disease"][0] if "disease" in hits else None
+            if found:
+                return [self.keyword_reply(found, wants_med, wants_doc, wants_both)], "keyword", found
+
+        # "neurologist at MedCity", "doctors at Apollo": served from the doctor directory index; a passing
+        # mention ("my dermatologist says ...") falls through to the symptom path
+        found_doctors = self._directory.search_reply(doctor_query)
+        if found_doctors:
+            return [found_doctors], "doctor_search", None
+
+        if wants_med or wants_doc or wants_both:
+            # general medicine questions ("pain relief tablets", "vitamin tablets") from medicine.json;
+            # a bare "doctor" / "medicine" still gets the prompt below
+            faq = self.medicine_index.match(u) if set(tokenize(u)) - INTENT_WORDS else None
+            if faq:
+                return [self.medicine_index.respond(faq.intent)], "medicine_faq", None
+            # No disease in the same message → ask for disease name explicitly (no prediction)
+            reply_html = "I didn't detect the disease name. Please include the disease (e.g., 'medicine for fever') or describe your symptoms so I can predict."
+            return [reply_html], "keyword_missing_disease", None
+
+        # 3) Otherwise treat message as symptoms → predict & provide remedies (Option 1)
+        # if user typed a single word that matches base disease, use it directly
+        matched = None
+        toks = [t for t in u.split() if t.strip()]
+        if len(toks) == 1:
+            matched = kb.index.exact(toks[0])
+        # try to match input phrase directly (exact base)
+        if not matched:
+            matched = kb.index.exact(u)
+
+        # greetings / emotional support from text.json, unless the symptom patterns fit the message better
+        local_pred = None
+        if not matched:
+            chat = self.mental_chat.match(u)
+            if chat:
+                local_pred = self.symptom_classifier.predict(u)
+                if chat.score >= local_pred.score:
+                    return [self.mental_chat_reply(session, chat.intent)], "mental_chat", session.get("offered_disease")
+
+        # general medicine questions the symptom patterns don't recognise are answered before asking the LLM
+        if not matched:
+            local_pred = local_pred or self.symptom_classifier.predict(u)
+            if local_pred.disease is None:
+                faq = self.medicine_index.match(u)
+                if faq:
+                    return [self.medicine_index.respond(faq.intent)], "medicine_faq", None
+
+        # if still not matched, call classifier (remedies for the top local guess start in parallel)
+        prefetch, predicted = {}, "unknown"
+        if not matched:
+            predicted = self.predict_disease_from_symptoms(u, on_shortlist=self.remedy_prefetcher(prefetch), local_pred=local_pred)
+            if predicted and predicted.lower() != "unknown":
+                matched = kb.index.exact(predicted)
+
+        if matched:
+            disease_name = matched.get("name")
+            self.settle_prefetch(prefetch, disease_name)
+            session["pending_disease"] = disease_name
+            return self.symptom_reply_parts(disease_name), "symptom", disease_name
+        self.settle_prefetch(prefetch, None)
+        if predicted is None:
+            # Cohere failed, timed out or is switched off by the circuit breaker: answer from local data
+            return [self.degraded_reply(local_pred.candidates if local_pred else [])], "degraded", None
+        return ["I couldn't identify the condition. Please describe your symptoms more clearly or name the disease."], "unknown", None
+
+    def handle(self, session, message: str, on_chunk=None) -> Reply:
+        """Answer `message`, appending both turns to session["messages"].
+
+        on_chunk(html) is called with each successive snapshot of the reply as it
+        streams (once for locally answered messages); the final HTML is returned.
+        """
+        with tracing.request("chat") as trace:
+            started = time.perf_counter()
+            if session.get("messages") is None:
+                session["messages"] = []
+            # store user message first
+            session["messages"].append({"role": "user", "message": message})
+
+            with span("route"):
+                parts, route, disease = self._route(session, message.strip())
+            trace.attrs["route"] = route
+            html, ttfb, paint = "", None, 0.0
+            for html in parts:
+                if on_chunk:
+                    t0 = time.perf_counter()
+                    on_chunk(html)
+                    paint += time.perf_counter() - t0
+                if ttfb is None:
+                    ttfb = time.perf_counter() - started
+            if on_chunk:
+                tracing.record_span("paint", paint)
+            total = time.perf_counter() - started
+            metrics.record_response(route, ttfb if ttfb is not None else total, total)
+
+            session["messages"].append({"role": "ai", "message": html})
+            return Reply(html, route, disease)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_chat_engine():
+    """Process-wide engine over the default knowledge base and Cohere client."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = ChatEngine()
+        return _engine
@@ -0,0 +1,94 @@
+import os
+import re
+from collections import namedtuple
+
+# ----------------------------
+# Classifier prompt: a token-budgeted shortlist of candidate diseases, listed under short ID codes
+# ----------------------------
+# The model answers with a code ("C3") that is mapped back to the disease name, so neither the prompt
+# nor the answer grows with the catalog. Token counts are estimates (about one token per short word
+# piece); the billed counts are in metrics as llm_tokens_total.
+CLASSIFY_PROMPT_TOKENS = int(os.getenv("CLASSIFY_PROMPT_TOKENS", 400))  # whole prompt, symptoms included
+CLASSIFY_MAX_CANDIDATES = int(os.getenv("CLASSIFY_MAX_CANDIDATES", 12))
+SYMPTOM_SHARE = 0.5  # at most this part of the budget is spent on the user's message
+
+TOKEN_PIECE_RE = re.compile(r"[A-Za-z]{1,6}|\d{1,3}|[^\sA-Za-z\d]")
+CODE_RE = re.compile(r"\bC(\d+)\b", re.IGNORECASE)
+
+HEADER = """
+You are a cautious clinical classifier. Based on the user's symptoms below, return EXACTLY one code from the list of possible conditions or 'unknown'.
+
+Symptoms:
+{symptoms}
+
+Possible conditions:
+"""
+FOOTER = """
+Return exactly one value (a code such as C1) or 'unknown'.
+"""
+
+ClassifierPrompt = namedtuple("ClassifierPrompt", ["text", "codes", "tokens", "truncated"])
+
+
+def estimate_tokens(text: str) -> int:
+    return len(TOKEN_PIECE_RE.findall(text or ""))
+
+
+def clip_to_tokens(text: str, budget: int) -> str:
+    """Leading words of `text` that fit in `budget` estimated tokens."""
+    words, used = [], 0
+    for word in text.split():
+        cost = estimate_tokens(word)
+        if used + cost > budget:
+            break
+        words.append(word)
+        used += cost
+    return " ".join(words)
+
+
+def shortlist(symptoms: str, ranked, index, limit: int = CLASSIFY_MAX_CANDIDATES):
+    """`ranked` (the local classifier's candidates) topped up with disease names sharing trigrams with the message.
+
+    The top-up covers knowledge-base diseases that have no symptom patterns.
+    """
+    names = list(dict.fromkeys(ranked))[:limit]
+    if len(names) < limit:
+        for key in index.candidates(symptoms.lower(), limit):
+            name = index.exact_name(key)
+            if name and name not in names:
+                names.append(name)
+                if len(names) == limit:
+                    break
+    return names
+
+
+def build_prompt(symptoms: str, candidates, budget: int = CLASSIFY_PROMPT_TOKENS,
+                 max_candidates: int = CLASSIFY_MAX_CANDIDATES) -> ClassifierPrompt:
+    """Prompt listing as many candidates (best first) as fit in `budget`; always at least one."""
+    fixed = estimate_tokens(HEADER) + estimate_tokens(FOOTER)
+    symptoms = symptoms.strip()
+    clipped = clip_to_tokens(symptoms, int((budget - fixed) * SYMPTOM_SHARE))
+    truncated = clipped != " ".join(symptoms.split())
+    used = fixed + estimate_tokens(clipped)
+    lines, codes = [], {}
+    for i, name in enumerate(candidates[:max_candidates], 1):
+        line = f"C{i} {name}"
+        cost = estimate_tokens(line)
+        if lines and used + cost > budget:
+            truncated = True
+            break
+        lines.append(line)
+        codes[f"C{i}"] = name
+        used += cost
+    text = HEADER.format(symptoms=clipped) + "\n".join(lines) + "\n" + FOOTER
+    return ClassifierPrompt(text, codes, used, truncated)
+
+
+def parse_answer(answer: str, codes: dict):
+    """Disease name for a returned code, 'unknown', or None when the answer is neither."""
+    if answer.strip().lower().startswith("unknown"):
+        return "unknown"
+    m = CODE_RE.search(answer)
+    if m:
+        return codes.get(f"C{int(m.group(1))}")
+    return None
@@ -0,0 +1,203 @@
+import atexit
+import datetime
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+# ----------------------------
+# Append-only conversation logs: conversations/<conversation_id>.jsonl, one record per message
+# ----------------------------
+CONV_DIR = os.getenv("CONVERSATIONS_DIR", "conversations")
+LOG_SUFFIX = ".jsonl"
+FSYNC_EVERY = int(os.getenv("CONV_FSYNC_EVERY", 16))  # records
+FSYNC_INTERVAL = float(os.getenv("CONV_FSYNC_INTERVAL", 2.0))  # seconds
+MAX_OPEN_FILES = 64
+
+
+def new_conversation_id():
+    # sortable by creation time; the random suffix avoids same-second collisions
+    return datetime.datetime.now().strftime("%Y%m%d_%H%M%S_") + secrets.token_hex(3)
+
+
+class ConversationLog:
+    """Appends messages as JSON lines and fsyncs in batches.
+
+    Every append is flushed to the OS immediately; fsync happens every
+    FSYNC_EVERY records or FSYNC_INTERVAL seconds per file, and on close.
+    A {"op": "reset"} record discards everything before it; compact() rewrites
+    a log with only its live messages.
+    """
+
+    def __init__(self, conv_dir=CONV_DIR):
+        self.conv_dir = conv_dir
+        os.makedirs(conv_dir, exist_ok=True)
+        self._files = OrderedDict()  # conversation_id -> [file, unsynced records, last fsync time]
+        self._lock = threading.Lock()
+        self.bytes_written = 0
+
+    def path(self, conversation_id):
+        return os.path.join(self.conv_dir, conversation_id + LOG_SUFFIX)
+
+    def _handle(self, conversation_id):
+        entry = self._files.get(conversation_id)
+        if entry is None:
+            entry = [open(self.path(conversation_id), "ab"), 0, time.monotonic()]
+            self._files[conversation_id] = entry
+            while len(self._files) > MAX_OPEN_FILES:
+                _, old = self._files.popitem(last=False)
+                self._close_entry(old)
+        self._files.move_to_end(conversation_id)
+        return entry
+
+    @staticmethod
+    def _sync(entry):
+        entry[0].flush()
+        os.fsync(entry[0].fileno())
+        entry[1] = 0
+        entry[2] = time.monotonic()
+
+    def _close_entry(self, entry):
+        if entry[1]:
+            self._sync(entry)
+        entry[0].close()
+
+    def _write(self, conversation_id, records):
+        """Write records; returns the byte offset of each one."""
+        lines = [(json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8") for r in records]
+        with self._lock:
+            entry = self._handle(conversation_id)
+            offsets, pos = [], entry[0].tell()
+            for line in lines:
+                offsets.append(pos)
+                pos += len(line)
+            entry[0].write(b"".join(lines))
+            entry[0].flush()
+            self.bytes_written += pos - offsets[0]
+            entry[1] += len(records)
+            if entry[1] >= FSYNC_EVERY or time.monotonic() - entry[2] >= FSYNC_INTERVAL:
+                self._sync(entry)
+        return offsets
+
+    def append(self, conversation_id, messages):
+        """Append message dicts ({"role", "message"}) to the conversation's log; returns their byte offsets."""
+        if not messages:
+            return []
+        return self._write(conversation_id, [{"role": m.get("role", "ai"), "message": m.get("message"), "ts": time.time()} for m in messages])
+
+    def reset(self, conversation_id):
+        self._write(conversation_id, [{"op": "reset", "ts": time.time()}])
+
+    def _flush_pending(self, conversation_id):
+        with self._lock:
+            entry = self._files.get(conversation_id)
+            if entry is not None:
+                entry[0].flush()
+
+    def read_at(self, conversation_id, offset, count):
+        """Read `count` message records starting at byte `offset` (as returned by append)."""
+        self._flush_pending(conversation_id)
+        messages = []
+        with open(self.path(conversation_id), "rb") as f:
+            f.seek(offset)
+            while len(messages) < count:
+                line = f.readline()
+                if not line:
+                    break
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if rec.get("op") != "reset":
+                    messages.append({"role": rec.get("role", "ai"), "message": rec.get("message")})
+        return messages
+
+    def offsets(self, conversation_id):
+        """Byte offsets of the live message records (used to rebuild an index after compaction)."""
+        path = self.path(conversation_id)
+        if not os.path.exists(path):
+            return []
+        self._flush_pending(conversation_id)
+        offsets, pos = [], 0
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    if rec.get("op") == "reset":
+                        offsets = []
+                    else:
+                        offsets.append(pos)
+                pos += len(line)
+        return offsets
+
+    def read(self, conversation_id):
+        """Live messages of a conversation (records after the last reset)."""
+        path = self.path(conversation_id)
+        if not os.path.exists(path):
+            return []
+        self._flush_pending(conversation_id)
+        return self._read_file(path)
+
+    @staticmethod
+    def _read_file(path):
+        messages = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line after a crash
+                if rec.get("op") == "reset":
+                    messages = []
+                else:
+                    messages.append({"role": rec.get("role", "ai"), "message": rec.get("message")})
+        return messages
+
+    def compact(self, conversation_id):
+        """Rewrite the log keeping only live messages (atomic replace).
+
+        The lock is held from the read to the replace, so an append can't land in between and be lost.
+        """
+        path = self.path(conversation_id)
+        with self._lock:
+            entry = self._files.pop(conversation_id, None)
+            if entry is not None:
+                self._close_entry(entry)
+            if not os.path.exists(path):
+                return 0
+            messages = self._read_file(path)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for m in messages:
+                    f.write(json.dumps(m, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        return len(messages)
+
+    def close(self):
+        with self._lock:
+            while self._files:
+                _, entry = self._files.popitem(last=False)
+                self._close_entry(entry)
+
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def get_conversation_log(conv_dir=CONV_DIR):
+    with _logs_lock:
+        log = _logs.get(conv_dir)
+        if log is None:
+            log = _logs[conv_dir] = ConversationLog(conv_dir)
+            atexit.register(log.close)
+        return log
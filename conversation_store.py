@@ -0,0 +1,255 @@
+import argparse
+import datetime
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+from conversation_log import CONV_DIR, LOG_SUFFIX, get_conversation_log, new_conversation_id
+
+# ----------------------------
+# Conversation catalog: SQLite index over the JSONL logs
+# ----------------------------
+CATALOG_NAME = "catalog.sqlite3"
+LEGACY_DIR = "legacy"
+TITLE_LENGTH = 60
+
+
+def make_title(messages):
+    for m in messages:
+        if m.get("role") == "user" and m.get("message"):
+            text = " ".join(str(m["message"]).split())
+            return text if len(text) <= TITLE_LENGTH else text[:TITLE_LENGTH - 1] + "…"
+    return "Untitled chat"
+
+
+class ConversationCatalog:
+    """(id, user, created_at, updated_at, title, message_count) per conversation,
+    plus the byte offset of every message so ranges can be read without parsing the whole log."""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS conversations (
+                id TEXT PRIMARY KEY, user TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL,
+                title TEXT NOT NULL, message_count INTEGER NOT NULL DEFAULT 0);
+            CREATE INDEX IF NOT EXISTS conversations_recent ON conversations(updated_at DESC);
+            CREATE INDEX IF NOT EXISTS conversations_user_recent ON conversations(user, updated_at DESC);
+            CREATE TABLE IF NOT EXISTS message_offsets (
+                conversation_id TEXT NOT NULL, seq INTEGER NOT NULL, offset INTEGER NOT NULL,
+                PRIMARY KEY (conversation_id, seq)) WITHOUT ROWID;
+            """
+        )
+        self._conn.commit()
+
+    def record(self, conversation_id, user, messages, offsets, created_at=None):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT message_count FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+            start = row["message_count"] if row else 0
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO conversations (id, user, created_at, updated_at, title, message_count) VALUES (?, ?, ?, ?, ?, ?)",
+                    (conversation_id, user, created_at or now, created_at or now, make_title(messages), len(messages)),
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE conversations SET updated_at = ?, message_count = message_count + ?,"
+                    " user = COALESCE(user, ?) WHERE id = ?",
+                    (now, len(messages), user, conversation_id),
+                )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO message_offsets (conversation_id, seq, offset) VALUES (?, ?, ?)",
+                [(conversation_id, start + i, off) for i, off in enumerate(offsets)],
+            )
+            self._conn.commit()
+
+    def replace_offsets(self, conversation_id, offsets):
+        with self._lock:
+            self._conn.execute("DELETE FROM message_offsets WHERE conversation_id = ?", (conversation_id,))
+            self._conn.executemany(
+                "INSERT INTO message_offsets (conversation_id, seq, offset) VALUES (?, ?, ?)",
+                [(conversation_id, i, off) for i, off in enumerate(offsets)],
+            )
+            self._conn.execute("UPDATE conversations SET message_count = ? WHERE id = ?", (len(offsets), conversation_id))
+            self._conn.commit()
+
+    def get(self, conversation_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+        return dict(row) if row else None
+
+    def offset_of(self, conversation_id, seq):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT offset FROM message_offsets WHERE conversation_id = ? AND seq = ?", (conversation_id, seq)
+            ).fetchone()
+        return row["offset"] if row else None
+
+    @staticmethod
+    def _owner_filter(user, all_users=False):
+        """Only `user`'s chats; with user=None only chats saved without a login (never everyone's)."""
+        if all_users:
+            return "", []
+        if user is None:
+            return " WHERE user IS NULL", []
+        return " WHERE user = ?", [user]
+
+    def page(self, user=None, limit=20, offset=0):
+        """Most recently updated conversations of `user` first (served from the index, no directory scan)."""
+        where, args = self._owner_filter(user)
+        sql = "SELECT * FROM conversations" + where
+        sql += " ORDER BY updated_at DESC LIMIT ? OFFSET ?"
+        args += [limit, offset]
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(sql, args).fetchall()]
+
+    def count(self, user=None, all_users=False):
+        where, args = self._owner_filter(user, all_users)
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM conversations" + where, args).fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+class ConversationStore:
+    """Append-only logs (conversation_log.py) plus the catalog that lists and slices them."""
+
+    def __init__(self, conv_dir=CONV_DIR):
+        self.conv_dir = conv_dir
+        self.log = get_conversation_log(conv_dir)
+        self.catalog = ConversationCatalog(os.path.join(conv_dir, CATALOG_NAME))
+
+    def append(self, conversation_id, messages, user=None):
+        if not messages:
+            return
+        offsets = self.log.append(conversation_id, messages)
+        self.catalog.record(conversation_id, user, messages, offsets)
+
+    def reset(self, conversation_id):
+        self.log.reset(conversation_id)
+        self.catalog.replace_offsets(conversation_id, [])
+
+    def compact(self, conversation_id):
+        self.log.compact(conversation_id)
+        self.catalog.replace_offsets(conversation_id, self.log.offsets(conversation_id))
+
+    def list(self, user=None, limit=20, offset=0):
+        return self.catalog.page(user=user, limit=limit, offset=offset)
+
+    def count(self, user=None, all_users=False):
+        return self.catalog.count(user=user, all_users=all_users)
+
+    def info(self, conversation_id):
+        return self.catalog.get(conversation_id)
+
+    def read(self, conversation_id, start=0, stop=None):
+        """Messages [start:stop] of a conversation; seeks straight to `start` via the offset index."""
+        info = self.catalog.get(conversation_id)
+        total = info["message_count"] if info else 0
+        stop = total if stop is None else min(stop, total)
+        start = max(start, 0)
+        if start >= stop:
+            return []
+        offset = self.catalog.offset_of(conversation_id, start)
+        if offset is None:
+            return self.log.read(conversation_id)[start:stop]
+        return self.log.read_at(conversation_id, offset, stop - start)
+
+    def read_tail(self, conversation_id, count):
+        info = self.catalog.get(conversation_id)
+        total = info["message_count"] if info else 0
+        return self.read(conversation_id, max(total - count, 0), total)
+
+    # ----------------------------
+    # Migration from the old layout
+    # ----------------------------
+    def index_log(self, conversation_id, user=None):
+        """Add an existing .jsonl log (written before the catalog existed) to the catalog."""
+        messages = self.log.read(conversation_id)
+        created = os.path.getmtime(self.log.path(conversation_id))
+        self.catalog.record(conversation_id, user, messages, self.log.offsets(conversation_id), created_at=created)
+
+    def migrate_legacy(self, user=None, keep_originals=True):
+        """Convert legacy conversations/*.json snapshots into logs and index unindexed .jsonl logs.
+
+        Imported chats belong to `user`; without one they have no owner and are only listed when
+        logins are off (REQUIRE_LOGIN=0), never to a logged-in account. An original is moved to
+        conversations/legacy/ (or deleted with keep_originals=False) only after its log is written and indexed.
+        Returns the number of conversations added to the catalog.
+        """
+        added = 0
+        for name in sorted(os.listdir(self.conv_dir)):
+            path = os.path.join(self.conv_dir, name)
+            if name.endswith(LOG_SUFFIX):
+                conversation_id = name[:-len(LOG_SUFFIX)]
+                if self.catalog.get(conversation_id) is None:
+                    self.index_log(conversation_id, user=user)
+                    added += 1
+            elif name.endswith(".json"):
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        messages = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    continue
+                if not isinstance(messages, list):
+                    continue
+                stem = name[:-len(".json")]
+                try:
+                    created = datetime.datetime.strptime(stem, "%Y%m%d_%H%M%S").timestamp()
+                except ValueError:
+                    created = os.path.getmtime(path)
+                conversation_id = stem + "_legacy" if self.catalog.get(stem + "_legacy") is None else new_conversation_id()
+                offsets = self.log.append(conversation_id, messages)
+                self.catalog.record(conversation_id, user, messages, offsets, created_at=created)
+                if keep_originals:
+                    os.makedirs(os.path.join(self.conv_dir, LEGACY_DIR), exist_ok=True)
+                    shutil.move(path, os.path.join(self.conv_dir, LEGACY_DIR, name))
+                else:
+                    os.remove(path)
+                added += 1
+        return added
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_conversation_store(conv_dir=CONV_DIR):
+    with _stores_lock:
+        store = _stores.get(conv_dir)
+        if store is None:
+            store = _stores[conv_dir] = ConversationStore(conv_dir)
+        return store
+
+
+# ----------------------------
+# Migration tool: python conversation_store.py --migrate
+# ----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Conversation catalog maintenance")
+    parser.add_argument("--dir", default=CONV_DIR)
+    parser.add_argument("--migrate", action="store_true", help="import legacy *.json chats and unindexed *.jsonl logs")
+    parser.add_argument("--user", default=None, help="owner of the migrated chats (required with --migrate)")
+    parser.add_argument("--delete-originals", action="store_true", help="delete legacy files instead of moving them to legacy/")
+    parser.add_argument("--compact", metavar="CONVERSATION_ID", help="rewrite one log without superseded records")
+    args = parser.parse_args()
+
+    if args.migrate and not args.user:
+        parser.error("--migrate needs --user: old chats are only listed for the account that owns them")
+
+    os.makedirs(args.dir, exist_ok=True)
+    store = get_conversation_store(args.dir)
+    if args.migrate:
+        print(f"✅ Migrated {store.migrate_legacy(user=args.user, keep_originals=not args.delete_originals)} conversations")
+    if args.compact:
+        store.compact(args.compact)
+        print(f"✅ Compacted {args.compact}")
+    print(f"{store.count(all_users=True)} conversations in catalog")
@@ -0,0 +1,115 @@
+from collections import Counter, defaultdict
+from itertools import chain
+from difflib import SequenceMatcher
+
+# ----------------------------
+# Disease lookup index (exact + trigram fuzzy)
+# ----------------------------
+PREFIXES = ["acute ", "chronic ", "severe ", "mild "]
+
+
+# Helper: normalize predicted/queried disease to base by removing prefixes like "acute", "chronic" etc.
+def normalize_to_base(name: str) -> str:
+    if not name:
+        return name
+    n = name.strip()
+    lower = n.lower()
+    # remove common prefixes
+    for prefix in PREFIXES:
+        if lower.startswith(prefix):
+            n = n[len(prefix):].strip()
+            break
+    # also if name contains parentheses or extra suffix, strip after '('
+    if "(" in n:
+        n = n.split("(")[0].strip()
+    return n
+
+
+def lookup_key(name: str) -> str:
+    return normalize_to_base(name or "").strip().lower()
+
+
+def aliases_for(name: str):
+    """Keys a record can be found under: its base name, full name and any '(...)' alias."""
+    keys = [lookup_key(name), (name or "").strip().lower()]
+    if "(" in name and ")" in name:
+        inner = name[name.index("(") + 1:name.index(")")]
+        keys.append(inner.strip().lower())
+    return [k for k in keys if k]
+
+
+def trigrams(text: str):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class DiseaseIndex:
+    """O(1) exact lookup on normalized names plus a trigram index for fuzzy matching.
+
+    When several records share a key (e.g. "Fever" and "Acute Fever"), the first
+    one in the source order wins, matching the old linear scan. Keys map to
+    positions in `disease_data`, which may be any sequence (e.g. the lazily
+    decoded records of a snapshot); pass `names` to avoid touching the records.
+    """
+
+    def __init__(self, disease_data, rerank=10, names=None):
+        self.rerank = rerank
+        self.records = disease_data
+        self.names = list(names) if names is not None else [d["name"] for d in disease_data]
+        self.by_key = {}
+        for i, name in enumerate(self.names):
+            for key in aliases_for(name):
+                self.by_key.setdefault(key, i)
+        self.keys = list(self.by_key)
+        self.postings = defaultdict(list)
+        for i, key in enumerate(self.keys):
+            for g in trigrams(key):
+                self.postings[g].append(i)
+
+    def __len__(self):
+        return len(self.by_key)
+
+    def _exact_position(self, query: str):
+        return self.by_key.get(lookup_key(query)) if query else None
+
+    def exact(self, query: str):
+        i = self._exact_position(query)
+        return None if i is None else self.records[i]
+
+    def exact_name(self, query: str):
+        """Like exact(), but returns only the disease name, without touching the record."""
+        i = self._exact_position(query)
+        return None if i is None else self.names[i]
+
+    def candidates(self, q: str, limit: int):
+        """Keys sharing the most trigrams with `q`, best first."""
+        counts = Counter(chain.from_iterable(self.postings.get(g, ()) for g in trigrams(q)))
+        return [self.keys[i] for i, _ in counts.most_common(limit)]
+
+    def fuzzy(self, query: str, cutoff: float = 0.6):
+        """Exact match first, then the closest key by difflib ratio among trigram candidates."""
+        i = self._fuzzy_position(query, cutoff)
+        return None if i is None else self.records[i]
+
+    def fuzzy_name(self, query: str, cutoff: float = 0.6):
+        i = self._fuzzy_position(query, cutoff)
+        return None if i is None else self.names[i]
+
+    def _fuzzy_position(self, query: str, cutoff: float):
+        if not query:
+            return None
+        q = lookup_key(query)
+        hit = self.by_key.get(q)
+        if hit is not None:
+            return hit
+        best_key, best_score = None, cutoff
+        matcher = SequenceMatcher()
+        matcher.set_seq2(q)
+        for key in self.candidates(q, self.rerank):
+            matcher.set_seq1(key)
+            if matcher.real_quick_ratio() < best_score or matcher.quick_ratio() < best_score:
+                continue
+            score = matcher.ratio()
+            if score >= best_score:
+                best_key, best_score = key, score
+        return self.by_key[best_key] if best_key else None
@@ -0,0 +1,210 @@
+import re
+from collections import defaultdict, namedtuple
+
+from keyword_matcher import KeywordMatcher
+from tracing import span
+
+# ----------------------------
+# Doctor directory: deduplicated doctors indexed by disease, specialization and hospital,
+# with each per-disease reply fragment rendered once, on first use
+# ----------------------------
+SEARCH_LIMIT = 20  # doctors listed for a specialization/hospital query
+SIDEBAR_DOCTORS = 6
+HOSPITAL_WORDS = ("hospitals", "hospital", "clinic")
+GENERIC_ALIASES = {"general", "city", "care", "sri", "warangal"}
+# A specialization/hospital mention is only a directory query when the rest of the message asks for doctors
+# ("doctors at Apollo") or is nothing but filler ("neurologist at MedCity"); "my dermatologist says I have
+# eczema" or "I went to MGM hospital with chest pain" are left to the symptom path.
+ASK_WORDS = {"doctor", "doctors", "dr", "specialist", "specialists", "consult", "hospital", "hospitals", "clinic", "clinics"}
+FILLER_WORDS = {"show", "list", "find", "me", "all", "any", "available", "near", "nearby", "at", "in", "from", "who",
+                "which", "are", "is", "the", "a", "an", "of", "please", "give", "get", "there", "what", "whats", "for",
+                "by", "working", "to", "see", "warangal", "city"}
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+Doctor = namedtuple("Doctor", ["name", "specialization", "hospital", "contact"])
+DoctorQuery = namedtuple("DoctorQuery", ["specialization", "hospital", "doctors", "rest", "explicit"])
+
+
+def as_doctor(entry) -> Doctor:
+    if isinstance(entry, dict):
+        return Doctor(*(str(entry.get(k) or "").strip() for k in Doctor._fields))
+    return Doctor(str(entry).strip(), "", "", "")
+
+
+def html_bullet_list(items):
+    if not items:
+        return "<i>None listed</i>"
+    return "<ul>" + "".join(f"<li>{it}</li>" for it in items) + "</ul>"
+
+
+def doctor_item_html(doc: Doctor) -> str:
+    if not (doc.specialization or doc.hospital):
+        return f"<li>{doc.name}</li>"
+    return f"<li><b>{doc.name or 'Unknown'}</b> — {doc.specialization} ({doc.hospital})</li>"
+
+
+def doctor_item_markdown(doc: Doctor) -> str:
+    if not (doc.specialization or doc.hospital):
+        return f"- {doc.name}"
+    return f"- {doc.name or 'Unknown'} ({doc.specialization}) — {doc.hospital}"
+
+
+def specialization_aliases(spec: str):
+    lower = spec.lower()
+    return [lower, lower + "s"]
+
+
+def hospital_aliases(hospital: str):
+    """Full name, name without the town, and the distinctive part without "Hospital"/"Clinic"."""
+    lower = hospital.lower()
+    base = lower.split(",")[0].strip()
+    if base.endswith(" warangal"):
+        base = base[:-len(" warangal")].strip()
+    short = base
+    for word in HOSPITAL_WORDS:
+        if short.endswith(" " + word):
+            short = short[:-len(word) - 1].strip()
+            break
+    aliases = [lower, base]
+    if short != base and len(short) >= 3 and short not in GENERIC_ALIASES:
+        aliases.append(short)
+    return aliases
+
+
+class DoctorDirectory:
+    """Doctors deduplicated across diseases, plus rendered replies per disease.
+
+    reply(disease, kind) and sidebar_markdown(disease) render a disease's fragments
+    on first use and are dictionary lookups after that; search(text) resolves
+    specialization/hospital mentions ("neurologist at MedCity") through one keyword
+    automaton and caches each combination. Build it with from_snapshot() to index a
+    snapshot's doctor columns without decoding its disease records.
+    """
+
+    def __init__(self, disease_data, names=None):
+        names = names if names is not None else [d["name"] for d in disease_data]
+        self._index(names, ([as_doctor(e) for e in d.get("doctors", [])] for d in disease_data),
+                    lambda i: disease_data[i].get("medicines", []))
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Directory over a KnowledgeSnapshot: each distinct doctor is decoded once, medicines on first reply."""
+        directory = cls.__new__(cls)
+        doctors = [as_doctor(snapshot.doctor(i)) for i in range(len(snapshot.doctors))]
+        directory._index(snapshot.names(), ([doctors[j] for j in ids] for ids in snapshot.doctor_ids()),
+                         snapshot.medicines)
+        return directory
+
+    def _index(self, names, doctor_lists, medicines):
+        """names[i] and doctor_lists[i] describe disease i; medicines(i) is only called when rendering."""
+        self.doctors = []
+        ids = {}
+        self.by_disease = {}
+        self.by_specialization = defaultdict(list)
+        self.by_hospital = defaultdict(list)
+        self._positions = {}
+        self._medicines = medicines
+        self._replies = {}
+        self._sidebar = {}
+        self._searches = {}
+
+        for position, (name, docs) in enumerate(zip(names, doctor_lists)):
+            if name in self.by_disease:
+                continue
+            doctor_ids = []
+            for doc in docs:
+                i = ids.get(doc)
+                if i is None:
+                    i = ids[doc] = len(self.doctors)
+                    self.doctors.append(doc)
+                    if doc.specialization:
+                        self.by_specialization[doc.specialization].append(i)
+                    if doc.hospital:
+                        self.by_hospital[doc.hospital].append(i)
+                doctor_ids.append(i)
+            self.by_disease[name] = doctor_ids
+            self._positions[name] = position
+
+        self.matcher = KeywordMatcher()
+        for spec in self.by_specialization:
+            for alias in specialization_aliases(spec):
+                self.matcher.add(alias, "specialization", spec)
+        for hospital in self.by_hospital:
+            for alias in hospital_aliases(hospital):
+                self.matcher.add(alias, "hospital", hospital)
+        self.matcher.build()
+
+    def _render(self, name):
+        """Render (once) the reply fragments of `name`; False for an unknown disease."""
+        if name in self._sidebar:
+            return True
+        position = self._positions.get(name)
+        if position is None:
+            return False
+        medicines = self._medicines(position)
+        docs = [self.doctors[i] for i in self.by_disease[name]]
+        med_html = html_bullet_list(medicines)
+        docs_html = "<ul>" + "".join(doctor_item_html(d) for d in docs) + "</ul>"
+        self._replies[name, "med"] = f"<b>💊 Medicines for {name}:</b><br>{med_html}"
+        self._replies[name, "doc"] = f"<b>👨‍⚕️ Doctors for {name}:</b><br>{docs_html}"
+        self._replies[name, "both"] = f"<b>💊 Medicines for {name}:</b><br>{med_html}<br><b>👨‍⚕️ Doctors:</b><br>{docs_html}"
+        med_md = "\n".join(f"- {m}" for m in medicines)
+        docs_md = "\n".join(doctor_item_markdown(d) for d in docs[:SIDEBAR_DOCTORS])
+        # written last: its presence marks the disease as rendered
+        self._sidebar[name] = f"**{name}**\n\n**Medicines:**\n\n{med_md}\n\n**Doctors:**\n\n{docs_md}"
+        return True
+
+    def reply(self, disease: str, kind: str):
+        """HTML for kind "med", "doc" or "both"; None for an unknown disease."""
+        return self._replies.get((disease, kind)) if self._render(disease) else None
+
+    def sidebar_markdown(self, disease: str):
+        return self._sidebar.get(disease) if self._render(disease) else None
+
+    def query(self, text: str):
+        """Specialization and/or hospital mentioned in `text` with their doctors, or None.
+
+        `rest` is the text outside those phrases; `explicit` is True when it asks for doctors or is only filler.
+        """
+        matches = self.matcher.find(text)
+        spec = next((m.value for m in matches if m.label == "specialization"), None)
+        hospital = next((m.value for m in matches if m.label == "hospital"), None)
+        if spec is None and hospital is None:
+            return None
+        ids = self.by_specialization.get(spec, []) if spec else self.by_hospital.get(hospital, [])
+        if spec and hospital:
+            ids = [i for i in ids if self.doctors[i].hospital == hospital]
+        pieces, pos = [], 0
+        for m in matches:
+            if m.label in ("specialization", "hospital"):
+                pieces.append(text[pos:m.start])
+                pos = m.end
+        rest = " ".join(pieces + [text[pos:]])
+        words = set(WORD_RE.findall(rest.lower()))
+        explicit = bool(words & ASK_WORDS) or words <= FILLER_WORDS
+        return DoctorQuery(spec, hospital, [self.doctors[i] for i in ids], rest, explicit)
+
+    def search(self, text: str):
+        """Rendered reply for an explicit specialization/hospital query, or None (see query())."""
+        return self.search_reply(self.query(text))
+
+    @span("doctor_search")
+    def search_reply(self, q):
+        """Rendered reply for a DoctorQuery, or None when there is none or it isn't explicit."""
+        if q is None or not q.explicit:
+            return None
+        key = (q.specialization, q.hospital)
+        html = self._searches.get(key)
+        if html is None:
+            html = self._searches[key] = self._render_search(q)
+        return html
+
+    @staticmethod
+    def _render_search(q):
+        who = f"{q.specialization}s" if q.specialization else "Doctors"
+        where = f" at {q.hospital}" if q.hospital else ""
+        if not q.doctors:
+            return f"I couldn't find any {who.lower()}{where} in our directory."
+        items = "".join(doctor_item_html(d) for d in q.doctors[:SEARCH_LIMIT])
+        more = f"<i>…and {len(q.doctors) - SEARCH_LIMIT} more</i>" if len(q.doctors) > SEARCH_LIMIT else ""
+        return f"<b>👨‍⚕️ {who}{where}:</b><br><ul>{items}</ul>{more}"
@@ -0,0 +1,126 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_stub import StubCohereClient
+
+# ----------------------------
+# Local fake of Cohere's /v1/chat endpoint for exercising timeouts, retries and the circuit breaker
+# ----------------------------
+# Point the app at it with COHERE_BASE_URL=http://127.0.0.1:<port>. Answers come from llm_stub;
+# failure behaviour is set at start-up or at runtime with POST /_control {"latency": 2.0, "error_rate": 0.5, ...}:
+#   latency      seconds before the response starts
+#   chunk_delay  seconds between streamed events
+#   error_rate   fraction of requests answered with `status`
+#   status       HTTP status used for injected errors (default 503)
+#   hang         accept requests but never answer them (until turned off)
+DEFAULT_BEHAVIOUR = {"latency": 0.0, "chunk_delay": 0.0, "error_rate": 0.0, "status": 503, "hang": False}
+
+
+class FakeCohereHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # keep benchmark output readable
+        pass
+
+    def _json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up (deadline)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        if self.path == "/_control":
+            with server.lock:
+                server.behaviour.update(payload)
+                self._json(200, dict(server.behaviour, requests=server.requests))
+            return
+        if self.path.rstrip("/") != "/v1/chat":
+            self._json(404, {"message": "not found"})
+            return
+
+        with server.lock:
+            server.requests += 1
+            b = dict(server.behaviour)
+        while b["hang"]:
+            time.sleep(0.05)
+            with server.lock:
+                b = dict(server.behaviour)
+        if b["latency"]:
+            time.sleep(b["latency"])
+        if random.random() < b["error_rate"]:
+            self._json(b["status"], {"message": "injected failure"})
+            return
+
+        message = payload.get("message", "")
+        text = server.stub._answer(message)
+        meta = {"billed_units": {"input_tokens": len(message.split()), "output_tokens": len(text.split())}}
+        response = {"text": text, "generation_id": "fake", "finish_reason": "COMPLETE", "meta": meta}
+        if not payload.get("stream"):
+            self._json(200, response)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/stream+json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        events = [{"event_type": "stream-start", "generation_id": "fake", "is_finished": False}]
+        step = max(1, len(text) // 4)
+        events += [{"event_type": "text-generation", "text": text[i:i + step], "is_finished": False} for i in range(0, len(text), step)]
+        events.append({"event_type": "stream-end", "finish_reason": "COMPLETE", "is_finished": True, "response": response})
+        try:
+            for event in events:
+                if b["chunk_delay"]:
+                    time.sleep(b["chunk_delay"])
+                line = json.dumps(event).encode("utf-8") + b"\n"
+                self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up (deadline) or stopped reading
+
+
+def start_fake_server(port=0, **behaviour):
+    """Serve on 127.0.0.1 in a daemon thread; returns the server (base URL in server.url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeCohereHandler)
+    server.daemon_threads = True
+    server.behaviour = dict(DEFAULT_BEHAVIOUR, **behaviour)
+    server.requests = 0
+    server.lock = threading.Lock()
+    server.stub = StubCohereClient()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def set_behaviour(server, **behaviour):
+    with server.lock:
+        server.behaviour.update(behaviour)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Cohere /v1/chat server for resilience testing")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--chunk-delay", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--status", type=int, default=503)
+    args = parser.parse_args()
+    srv = start_fake_server(args.port, latency=args.latency, chunk_delay=args.chunk_delay,
+                            error_rate=args.error_rate, status=args.status)
+    print(f"Fake Cohere listening on {srv.url} (COHERE_BASE_URL={srv.url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.shutdown()
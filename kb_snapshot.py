@@ -0,0 +1,251 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import threading
+from collections.abc import Sequence
+from functools import lru_cache
+
+import numpy as np
+
+# ----------------------------
+# Binary knowledge-base snapshot: interned strings + columnar uint32 arrays, opened with mmap
+# ----------------------------
+# Layout: MAGIC, uint32 header length, JSON header, then 8-byte aligned little-endian sections
+# (section offsets in the header are relative to the 8-byte aligned end of the header):
+#   str_offsets[n_strings + 1], str_blob      string table (utf-8), every string stored once
+#   disease_name[n]                           string id of each disease name
+#   med_ptr[n + 1], med_ids                   medicines of disease i: med_ids[med_ptr[i]:med_ptr[i + 1]]
+#   doc_ptr[n + 1], doc_ids                   doctors of disease i (ids into `doctors`)
+#   doctors[n_doctors, n_fields]              string id per doctor field (NONE when absent)
+# Pages are shared by every process that maps the same file.
+MAGIC = b"KBSNAP1\0"
+SNAPSHOT_SUFFIX = ".kbsnap"
+NONE = 0xFFFFFFFF
+PLAIN = ""  # doctor "field" holding doctors given as plain strings
+RECORD_CACHE = 1024
+
+
+def snapshot_path(json_path: str) -> str:
+    return os.path.splitext(json_path)[0] + SNAPSHOT_SUFFIX
+
+
+class _Strings:
+    def __init__(self):
+        self.ids = {}
+        self.items = []
+
+    def __call__(self, text):
+        if not isinstance(text, str):
+            raise ValueError(f"snapshot only stores strings, got {type(text).__name__}")
+        sid = self.ids.get(text)
+        if sid is None:
+            sid = self.ids[text] = len(self.items)
+            self.items.append(text)
+        return sid
+
+
+def build_snapshot(disease_data, source_sha256: str, out_path: str, source_stat=None):
+    """Write `disease_data` ({name, medicines, doctors} dicts) as a snapshot; returns its size in bytes.
+
+    `source_stat` (os.stat of the JSON) lets loaders trust the snapshot without re-hashing an unchanged
+    source. Raises ValueError for values a snapshot can't hold (non-string medicines or doctor fields).
+    """
+    strings = _Strings()
+    fields, doctor_ids, doctor_rows = [], {}, []
+    names, med_ptr, med_ids, doc_ptr, doc_ids = [], [0], [], [0], []
+    for d in disease_data:
+        names.append(strings(d["name"]))
+        med_ids += [strings(m) for m in d.get("medicines") or []]
+        med_ptr.append(len(med_ids))
+        for doc in d.get("doctors") or []:
+            items = {PLAIN: doc} if isinstance(doc, str) else doc
+            if not isinstance(items, dict):
+                raise ValueError(f"unsupported doctor entry in {d['name']!r}")
+            row = {}
+            for key, value in items.items():
+                if key not in fields:
+                    fields.append(key)
+                row[fields.index(key)] = strings(value)
+            key = tuple(sorted(row.items()))
+            if key not in doctor_ids:
+                doctor_ids[key] = len(doctor_rows)
+                doctor_rows.append(row)
+            doc_ids.append(doctor_ids[key])
+        doc_ptr.append(len(doc_ids))
+
+    doctors = np.full((len(doctor_rows), len(fields)), NONE, dtype="<u4")
+    for i, row in enumerate(doctor_rows):
+        for col, sid in row.items():
+            doctors[i, col] = sid
+    encoded = [s.encode("utf-8") for s in strings.items]
+    str_offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+    np.cumsum([len(b) for b in encoded], out=str_offsets[1:])
+    sections = {
+        "str_offsets": str_offsets,
+        "str_blob": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "disease_name": np.array(names, dtype="<u4"),
+        "med_ptr": np.array(med_ptr, dtype="<u4"),
+        "med_ids": np.array(med_ids, dtype="<u4"),
+        "doc_ptr": np.array(doc_ptr, dtype="<u4"),
+        "doc_ids": np.array(doc_ids, dtype="<u4"),
+        "doctors": doctors,
+    }
+
+    layout, pos = {}, 0
+    for name, arr in sections.items():
+        pos += -pos % 8
+        layout[name] = [pos, arr.dtype.str, list(arr.shape)]
+        pos += arr.nbytes
+    header = json.dumps({
+        "version": 1, "source_sha256": source_sha256, "diseases": len(names),
+        "source_size": source_stat.st_size if source_stat else None,
+        "source_mtime_ns": source_stat.st_mtime_ns if source_stat else None,
+        "doctor_fields": fields, "sections": layout,
+    }).encode("utf-8")
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % 8)
+    base = len(MAGIC) + 4 + len(header)
+
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for name, arr in sections.items():
+            f.write(b"\0" * (base + layout[name][0] - f.tell()))
+            f.write(np.ascontiguousarray(arr).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+    os.replace(tmp, out_path)
+    return size
+
+
+class SnapshotRecords(Sequence):
+    """Read-only sequence of {name, medicines, doctors} dicts decoded on access (recent ones cached)."""
+
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+        self._get = lru_cache(maxsize=RECORD_CACHE)(snapshot.record)
+
+    def __len__(self):
+        return len(self._snapshot)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._get(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._get(i)
+
+
+class KnowledgeSnapshot:
+    """A snapshot file mapped read-only; arrays are zero-copy views of the mapping."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}: not a knowledge base snapshot")
+        (size,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(self._mm[start:start + size])
+        self.source_sha256 = self.header["source_sha256"]
+        self.source_stat = (self.header.get("source_size"), self.header.get("source_mtime_ns"))
+        self.doctor_fields = self.header["doctor_fields"]
+        base = start + size
+        for name, (offset, dtype, shape) in self.header["sections"].items():
+            count = int(np.prod(shape))
+            arr = np.frombuffer(self._mm, dtype=dtype, count=count, offset=base + offset) if count else np.zeros(0, dtype=dtype)
+            setattr(self, name, arr.reshape(shape))
+        self._blob_start = base + self.header["sections"]["str_blob"][0]
+        # memoryviews index to plain ints, much faster than numpy scalars on the per-record path
+        self._offsets, self._name_ids = self.str_offsets.data, self.disease_name.data
+        self._med_ptr, self._med_ids = self.med_ptr.data, self.med_ids.data
+        self._doc_ptr, self._doc_ids = self.doc_ptr.data, self.doc_ids.data
+        self._doctor_cells = self.doctors.reshape(-1).data
+        self._names = None
+        self._lock = threading.Lock()
+        self.records = SnapshotRecords(self)
+
+    def __len__(self):
+        return len(self.disease_name)
+
+    def string(self, sid):
+        if sid == NONE:
+            return None
+        return self._mm[self._blob_start + self._offsets[sid]:self._blob_start + self._offsets[sid + 1]].decode("utf-8")
+
+    def names(self):
+        """Disease names in source order (decoded once)."""
+        with self._lock:
+            if self._names is None:
+                self._names = [self.string(sid) for sid in self._name_ids]
+            return self._names
+
+    def doctor(self, i):
+        n = len(self.doctor_fields)
+        row = self._doctor_cells[i * n:(i + 1) * n]
+        values = {field: self.string(sid) for field, sid in zip(self.doctor_fields, row) if sid != NONE}
+        return values[PLAIN] if PLAIN in values else values
+
+    def medicines(self, i):
+        return [self.string(sid) for sid in self._med_ids[self._med_ptr[i]:self._med_ptr[i + 1]]]
+
+    def doctor_ids(self):
+        """Per disease, the row numbers of its doctors in `doctors` (no strings decoded)."""
+        return [self._doc_ids[self._doc_ptr[i]:self._doc_ptr[i + 1]].tolist() for i in range(len(self))]
+
+    def record(self, i):
+        docs = self._doc_ids[self._doc_ptr[i]:self._doc_ptr[i + 1]]
+        return {
+            "name": self.string(self._name_ids[i]),
+            "medicines": self.medicines(i),
+            "doctors": [self.doctor(d) for d in docs],
+        }
+
+
+def load_snapshot(path, source_sha256=None, source_stat=None):
+    """Open `path` if it exists, is a valid snapshot and (when given) was built from `source_sha256`; else None.
+
+    With `source_stat` instead, the source's size and mtime must match the ones recorded at build time.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        snapshot = KnowledgeSnapshot(path)
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+    if source_sha256 and snapshot.source_sha256 != source_sha256:
+        return None
+    if source_stat and (snapshot.source_stat[0] is None or snapshot.source_stat != (source_stat.st_size, source_stat.st_mtime_ns)):
+        return None
+    return snapshot
+
+
+# ----------------------------
+# Build step: python kb_snapshot.py [--json med_doctors_warangal.json] [--out ...]
+# ----------------------------
+if __name__ == "__main__":
+    import hashlib
+
+    from knowledge_base import find_json_file, normalize_records
+
+    parser = argparse.ArgumentParser(description="Compile the knowledge base JSON into a memory-mappable snapshot")
+    parser.add_argument("--json", default=None, help="source file (default: the one the app would load)")
+    parser.add_argument("--out", default=None, help=f"output path (default: <json>{SNAPSHOT_SUFFIX})")
+    args = parser.parse_args()
+
+    source = args.json or find_json_file()
+    if source is None:
+        raise SystemExit("No knowledge base JSON file found.")
+    with open(source, "rb") as f:
+        data = f.read()
+    out = args.out or snapshot_path(source)
+    size = build_snapshot(normalize_records(json.loads(data.decode("utf-8"))), hashlib.sha256(data).hexdigest(), out,
+                          source_stat=os.stat(source))
+    snap = KnowledgeSnapshot(out)
+    print(f"✅ Wrote {out}: {len(snap)} diseases, {len(snap.str_offsets) - 1} strings, "
+          f"{len(snap.doctors)} doctors, {size / 1024:.1f} KiB (source {len(data) / 1024:.1f} KiB)")
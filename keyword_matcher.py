@@ -0,0 +1,107 @@
+from collections import deque, namedtuple
+
+# ----------------------------
+# Multi-pattern matcher (Aho–Corasick) for disease names and intent keywords
+# ----------------------------
+Match = namedtuple("Match", ["start", "end", "label", "value"])
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordMatcher:
+    """Finds every registered phrase in one pass over the text.
+
+    Matching is case-insensitive and only accepts whole words, so "cold" does not
+    match inside "colder". Overlapping hits are resolved leftmost-longest: in
+    "medicine and doctor" the BOTH phrase wins over "medicine" and "doctor".
+    """
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._payloads = []  # pattern id -> (length, [(label, value), ...])
+        self._ids = {}
+        self._built = False
+
+    def add(self, phrase, label, value=None):
+        phrase = (phrase or "").strip().lower()
+        if not phrase:
+            return
+        pid = self._ids.get(phrase)
+        if pid is None:
+            pid = self._ids[phrase] = len(self._payloads)
+            self._payloads.append((len(phrase), []))
+            node = 0
+            for ch in phrase:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(pid)
+        payload = (label, phrase if value is None else value)
+        if payload not in self._payloads[pid][1]:
+            self._payloads[pid][1].append(payload)
+        self._built = False
+
+    def build(self):
+        queue = deque()
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            queue.append(nxt)
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+        return self
+
+    def _raw_hits(self, text):
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for pid in self._out[node]:
+                length = self._payloads[pid][0]
+                yield i + 1 - length, i + 1, pid
+
+    def find(self, text):
+        """Return non-overlapping whole-word matches, leftmost-longest, in text order."""
+        if not self._built:
+            self.build()
+        t = (text or "").lower()
+        hits = []
+        for start, end, pid in self._raw_hits(t):
+            if start > 0 and _is_word_char(t[start - 1]):
+                continue
+            if end < len(t) and _is_word_char(t[end]):
+                continue
+            hits.append((start, end, pid))
+        hits.sort(key=lambda h: (h[0], h[0] - h[1]))
+        matches, last_end = [], 0
+        for start, end, pid in hits:
+            if start < last_end:
+                continue
+            last_end = end
+            for label, value in self._payloads[pid][1]:
+                matches.append(Match(start, end, label, value))
+        return matches
+
+    def scan(self, text):
+        """Group matches by label: {label: [value, ...]} in text order."""
+        found = {}
+        for m in self.find(text):
+            found.setdefault(m.label, []).append(m.value)
+        return found
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+from disease_index import DiseaseIndex
+from kb_snapshot import load_snapshot, snapshot_path
+from tracing import span
+
+# ----------------------------
+# Disease knowledge base (shared by every Streamlit session in the process)
+# ----------------------------
+JSON_PATHS = ["intent_format_1000lines.json", "disease_medicine_doctor_intents.json", "med_doctors_warangal.json", "med_doctors_warangal_intent.json"]
+
+
+def find_json_file(paths=JSON_PATHS):
+    for p in paths:
+        if os.path.exists(p):
+            return p
+    return None
+
+
+def normalize_records(raw):
+    """Normalize the supported JSON layouts into a list of {name, medicines, doctors} dicts."""
+    disease_data = []
+    if isinstance(raw, dict) and "intents" in raw:
+        for it in raw["intents"]:
+            name = it.get("tag") or it.get("intent") or it.get("disease") or ""
+            meds = it.get("medicines") or it.get("medicine") or []
+            docs = it.get("doctor") or it.get("doctors") or it.get("warangal_doctors") or []
+            # if doctor entries are dicts with name/hospital, keep; else leave as-is
+            disease_data.append({"name": name, "medicines": meds, "doctors": docs})
+    elif isinstance(raw, dict) and "diseases" in raw:
+        # original format
+        for d in raw["diseases"]:
+            name = d.get("name") or d.get("disease") or ""
+            meds = d.get("medicines") or d.get("medicines_list") or []
+            docs = d.get("warangal_doctors") or d.get("warangal_doctors_list") or d.get("warangal_doctors", []) or d.get("doctor", [])
+            disease_data.append({"name": name, "medicines": meds, "doctors": docs})
+    elif isinstance(raw, list):
+        # list-of-objects
+        for d in raw:
+            name = d.get("disease") or d.get("tag") or d.get("intent") or d.get("name") or ""
+            meds = d.get("medicines") or d.get("medicine") or []
+            docs = d.get("doctor") or d.get("doctors") or []
+            disease_data.append({"name": name, "medicines": meds, "doctors": docs})
+    else:
+        raise ValueError("Unrecognized JSON structure.")
+    return disease_data
+
+
+class KnowledgeBase:
+    """Parsed disease data plus load statistics.
+
+    The object is rebuilt in place when the source file changes, so references
+    kept by sessions always see the current data. When a snapshot built from the
+    same JSON exists (python kb_snapshot.py), records come from the memory-mapped
+    snapshot instead of a parsed copy; if the JSON's size and mtime still match
+    the ones recorded in the snapshot, the JSON isn't even read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = None
+        self.digest = None
+        self.disease_data = []
+        self.disease_names = []
+        self.disease_names_lower = []
+        self.index = DiseaseIndex([])
+        self.load_seconds = 0.0
+        self.memory_bytes = 0
+        self.loads = 0
+        self.source = None  # "json" or "snapshot"
+        self.snapshot = None
+        self._lock = threading.Lock()
+
+    def _read(self):
+        with open(self.path, "rb") as f:
+            data = f.read()
+        return data, hashlib.sha256(data).hexdigest()
+
+    def _rebuild(self, data, digest, mtime, snapshot):
+        started = time.perf_counter()
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        if snapshot is not None:
+            disease_data, disease_names = snapshot.records, snapshot.names()
+        else:
+            disease_data = normalize_records(json.loads(data.decode("utf-8")))
+            disease_names = [d["name"] for d in disease_data]
+        disease_names_lower = [n.lower() for n in disease_names]
+        index = DiseaseIndex(disease_data, names=disease_names)
+        self.memory_bytes = max(tracemalloc.get_traced_memory()[0] - before, 0)
+        if not tracing:
+            tracemalloc.stop()
+
+        self.disease_data = disease_data
+        self.disease_names = disease_names
+        self.disease_names_lower = disease_names_lower
+        self.index = index
+        self.digest = digest
+        self.mtime = mtime
+        self.source = "json" if snapshot is None else "snapshot"
+        self.snapshot = snapshot
+        self.loads += 1
+        self.load_seconds = time.perf_counter() - started
+
+    def refresh(self):
+        """Reload if the file changed on disk. Returns True when data was rebuilt."""
+        stat = os.stat(self.path)
+        mtime = stat.st_mtime_ns
+        if mtime == self.mtime:
+            return False
+        with self._lock:
+            if mtime == self.mtime:
+                return False
+            # a snapshot recorded against this exact size + mtime is trusted without reading the JSON
+            data, snapshot = None, load_snapshot(snapshot_path(self.path), source_stat=stat)
+            if snapshot is not None:
+                digest = snapshot.source_sha256
+            else:
+                data, digest = self._read()
+            if digest == self.digest:
+                # touched but unchanged content; remember the new mtime only
+                self.mtime = mtime
+                return False
+            if snapshot is None:
+                snapshot = load_snapshot(snapshot_path(self.path), digest)
+            with span("kb_load"):
+                self._rebuild(data, digest, mtime, snapshot)
+            return True
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "diseases": len(self.disease_data),
+            "sha256": self.digest,
+            "source": self.source,
+            "load_seconds": self.load_seconds,
+            "memory_bytes": self.memory_bytes,
+            "loads": self.loads,
+        }
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load_knowledge_base(paths=JSON_PATHS):
+    """Return the process-wide KnowledgeBase, loading it on first use.
+
+    Raises FileNotFoundError when none of `paths` exist and ValueError when the
+    JSON layout is not recognised.
+    """
+    path = find_json_file(paths)
+    if path is None:
+        raise FileNotFoundError("No knowledge base JSON file found.")
+    with _cache_lock:
+        kb = _cache.get(path)
+        if kb is None:
+            kb = _cache[path] = KnowledgeBase(path)
+    kb.refresh()
+    return kb
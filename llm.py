@@ -0,0 +1,137 @@
+import os
+
+import cohere
+
+import metrics
+from remedy_cache import get_remedy_cache
+from resilient_client import LLMUnavailable, ResilientClient
+from tracing import span
+
+# ----------------------------
+# Cohere setup
+# ----------------------------
+COHERE_API_KEY = os.getenv("COHERE_API_KEY", "sWmE1lyhhw4XomK8LVSW58LlX0fe4ke89B1fxFvz")
+COHERE_TIMEOUT = float(os.getenv("COHERE_TIMEOUT", 30))
+COHERE_BASE_URL = os.getenv("COHERE_BASE_URL") or None  # e.g. a local fake_cohere_server.py
+# deadlines, retries and the circuit breaker live in the wrapper, so the SDK's own retries are off
+co = ResilientClient(cohere.Client(COHERE_API_KEY, base_url=COHERE_BASE_URL, timeout=COHERE_TIMEOUT, max_retries=0))
+COHERE_MODEL = "command-a-03-2025"
+
+# Bump when the remedy prompt or its post-processing changes so stale cache entries are ignored
+REMEDY_PROMPT_VERSION = "v1"
+REMEDIES_UNAVAILABLE = "<i>Remedies are temporarily unavailable. You can still ask for medicines and doctors.</i>"
+REMEDY_PROMPT = "Give 5 simple, safe home remedies for {disease}. Use short bullet points, each on a new line. Keep them non-prescriptive."
+
+
+def normalize_remedies_text(raw: str):
+    if not raw:
+        return "<i>No remedies available.</i>"
+    text = raw.strip()
+    # convert markdown bold to HTML
+    text = text.replace("**", "")
+    # replace common bullet markers with newline-dash
+    for sym in ["•", "–", "—", "•\u00A0"]:
+        text = text.replace(sym, "\n- ")
+    # split lines and build UL if lines contain '-'
+    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
+    if any(ln.startswith("-") for ln in lines):
+        items = []
+        for ln in lines:
+            if ln.startswith("-"):
+                items.append(ln.lstrip("- ").strip())
+            else:
+                items.append(ln)
+        return "<ul>" + "".join(f"<li>{it}</li>" for it in items) + "</ul>"
+    else:
+        # join paragraphs
+        return "<br>".join(lines)
+
+
+def llm_available(client=None):
+    """False while the Cohere circuit is open; callers then answer from local data only."""
+    available = getattr(client or co, "available", None)
+    return available() if available else True
+
+
+def record_usage(call: str, response):
+    """Count billed tokens from a chat response (or a stream-end event's response)."""
+    units = getattr(getattr(response, "meta", None), "billed_units", None)
+    for direction in ("input", "output"):
+        n = getattr(units, f"{direction}_tokens", None)
+        if n:
+            metrics.increment("llm_tokens_total", n, call=call, direction=direction)
+
+
+@span("remedies_llm")
+def generate_remedies(disease_name: str, client=None):
+    """Uncached Cohere call; raises on API errors so failures are never cached."""
+    resp = (client or co).chat(model=COHERE_MODEL, message=REMEDY_PROMPT.format(disease=disease_name), temperature=0.6, max_tokens=220)
+    record_usage("remedies", resp)
+    return normalize_remedies_text(resp.text)
+
+
+def get_remedies_from_cohere(disease_name: str, client=None):
+    try:
+        return prefetch_remedies(disease_name, client)
+    except LLMUnavailable:
+        return REMEDIES_UNAVAILABLE
+    except Exception as e:
+        metrics.record_error("remedies", e)
+        return f"<i>⚠️ Cohere error: {e}</i>"
+
+
+def cached_remedies(disease_name: str):
+    """Remedy HTML from the cache only (no Cohere call), or None."""
+    return get_remedy_cache().get(disease_name, COHERE_MODEL, REMEDY_PROMPT_VERSION)
+
+
+def stream_remedies(disease_name: str, client=None):
+    """Yield remedy HTML as it grows: once for a cached answer, per token chunk for a live Cohere stream.
+
+    The finished answer is cached; a failed stream yields an inline error instead.
+    """
+    cache = get_remedy_cache()
+    cached = cache.get(disease_name, COHERE_MODEL, REMEDY_PROMPT_VERSION)
+    if cached is not None:
+        yield cached
+        return
+    if not llm_available(client):
+        yield REMEDIES_UNAVAILABLE
+        return
+    text = ""
+    try:
+        stream = (client or co).chat_stream(model=COHERE_MODEL, message=REMEDY_PROMPT.format(disease=disease_name), temperature=0.6, max_tokens=220)
+        for event in stream:
+            if event.event_type == "text-generation":
+                text += event.text
+                yield normalize_remedies_text(text)
+            elif event.event_type == "stream-end":
+                record_usage("remedies", getattr(event, "response", None))
+    except LLMUnavailable:
+        yield (normalize_remedies_text(text) + "<br>" if text else "") + REMEDIES_UNAVAILABLE
+        return
+    except Exception as e:
+        metrics.record_error("remedies", e)
+        yield (normalize_remedies_text(text) + "<br>" if text else "") + f"<i>⚠️ Cohere error: {e}</i>"
+        return
+    html = normalize_remedies_text(text)
+    cache.set(disease_name, COHERE_MODEL, REMEDY_PROMPT_VERSION, html)
+    yield html
+
+
+def stream_first_line(prompt: str, client=None, call="classify", **kwargs):
+    """Stream a short completion and stop at the end of its first line (single-value answers)."""
+    text = ""
+    for event in (client or co).chat_stream(model=COHERE_MODEL, message=prompt, **kwargs):
+        if event.event_type == "text-generation":
+            text += event.text
+            if "\n" in text.strip():
+                break
+        elif event.event_type == "stream-end":
+            record_usage(call, getattr(event, "response", None))
+    return text.strip().splitlines()[0] if text.strip() else ""
+
+
+def prefetch_remedies(disease_name: str, client=None):
+    """Fill the cache for `disease_name` (used for speculative generation); returns the HTML."""
+    return get_remedy_cache().get_or_create(disease_name, COHERE_MODEL, REMEDY_PROMPT_VERSION, lambda d: generate_remedies(d, client))
@@ -0,0 +1,108 @@
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+# ----------------------------
+# Offline stand-ins for cohere.Client (benchmarks, batch runs, load tests)
+# ----------------------------
+STUB_REMEDIES = "- Rest and drink plenty of water\n- Eat light, balanced meals\n- See a doctor if symptoms persist"
+
+
+class StubCohereClient:
+    """Answers chat()/chat_stream() like cohere.Client without network access.
+
+    Classification prompts get the first code (or name) under "Possible conditions:";
+    everything else gets a fixed remedies list. `latency` seconds are spent
+    per call (spread over `chunks` stream events).
+    """
+
+    def __init__(self, latency=0.0, chunks=4):
+        self.latency = latency
+        self.chunks = max(1, chunks)
+        self.calls = 0
+
+    def _answer(self, message):
+        marker = "Possible conditions:"
+        if marker in message:
+            first = message.split(marker, 1)[1].strip().split("\n", 1)[0]
+            code = re.match(r"C\d+ ", first)
+            return code.group(0).strip() if code else first.split(",")[0].strip() or "unknown"
+        return STUB_REMEDIES
+
+    @staticmethod
+    def _meta(message, text):
+        # rough token counts (words) so usage metrics move in offline runs
+        units = SimpleNamespace(input_tokens=len(message.split()), output_tokens=len(text.split()))
+        return SimpleNamespace(billed_units=units)
+
+    def chat(self, model=None, message="", **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        text = self._answer(message)
+        return SimpleNamespace(text=text, meta=self._meta(message, text))
+
+    def chat_stream(self, model=None, message="", **kwargs):
+        self.calls += 1
+        text = self._answer(message)
+        step = -(-len(text) // self.chunks)
+        for i in range(0, len(text), step):
+            if self.latency:
+                time.sleep(self.latency / self.chunks)
+            yield SimpleNamespace(event_type="text-generation", text=text[i:i + step])
+        yield SimpleNamespace(event_type="stream-end", text="", response=SimpleNamespace(text=text, meta=self._meta(message, text)))
+
+
+class ReplayCohereClient(StubCohereClient):
+    """Answers prompts recorded by RecordingCohereClient; unrecorded prompts get the stub answers (counted in .misses)."""
+
+    def __init__(self, path, latency=0.0, chunks=4):
+        super().__init__(latency, chunks)
+        self.answers = {}
+        self.misses = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    rec = json.loads(line)
+                    self.answers[rec["message"]] = rec["text"]
+
+    def _answer(self, message):
+        text = self.answers.get(message)
+        if text is None:
+            self.misses += 1
+            return super()._answer(message)
+        return text
+
+
+class RecordingCohereClient:
+    """Wraps a real client and appends every prompt and answer to a JSONL file for ReplayCohereClient.
+
+    A stream the caller stops early (e.g. stream_first_line) is recorded up to that point.
+    """
+
+    def __init__(self, client, path):
+        self.client = client
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _record(self, message, text):
+        line = json.dumps({"message": message, "text": text}, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def chat(self, model=None, message="", **kwargs):
+        resp = self.client.chat(model=model, message=message, **kwargs)
+        self._record(message, resp.text)
+        return resp
+
+    def chat_stream(self, model=None, message="", **kwargs):
+        parts = []
+        try:
+            for event in self.client.chat_stream(model=model, message=message, **kwargs):
+                if getattr(event, "event_type", None) == "text-generation":
+                    parts.append(event.text or "")
+                yield event
+        finally:
+            self._record(message, "".join(parts))
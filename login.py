@@ -1,21 +1,34 @@
 import streamlit as st
-import subprocess
-import sys
-import os
-import threading
-import webbrowser
+import time
+import metrics
+from metrics_server import start_metrics_server
 from db_users import UserDatabase  # Now this import will work!
+from auth_tokens import get_verifier, issue_token
+
+# Chat page served by this same process (shares the knowledge base, Cohere client and Mongo pool)
+CHAT_PAGE = "app.py"
+CHAT_STATE_KEYS = ['messages', 'pending_disease', 'offered_disease', 'conversation_id', 'persisted_count', 'loaded_log', 'chat_page', 'session_id', 'history_shown']
+
+@st.cache_resource(show_spinner=False)
+def get_user_db():
+    """One UserDatabase per process; it shares the pooled MongoClient from db_users."""
+    return UserDatabase()
+
+def logout():
+    get_verifier().revoke(st.session_state.get('auth_token'))
+    for key in ['auth_status', 'user_id', 'username', 'auth_token'] + CHAT_STATE_KEYS:
+        st.session_state.pop(key, None)
+    # the next login in this tab starts a fresh chat
+    st.query_params.pop('sid', None)
+
+def show_account_sidebar():
+    st.sidebar.success(f"Logged in as {st.session_state.username}")
+    if st.sidebar.button("🚪 Logout"):
+        logout()
+        st.rerun()
 
 def show_auth_page():
     st.set_page_config(page_title="Document Vault - Login", page_icon="🔐", layout="centered")
-    
-    if st.session_state.get('auth_status'):
-        st.sidebar.success(f"Logged in as {st.session_state.username}")
-        if st.sidebar.button("🚪 Logout"):
-            for key in ['auth_status', 'user_id', 'username']:
-                st.session_state.pop(key, None)
-            st.rerun()
-        return True
 
     st.markdown("<div style='height: 50px;'></div>", unsafe_allow_html=True)
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -32,15 +45,17 @@ def show_auth_page():
                 pwd = st.text_input("Password", type="password", placeholder="Enter password")
                 if st.form_submit_button("🔐 Login", use_container_width=True):
                     if user and pwd:
-                        db = UserDatabase()
+                        db = get_user_db()
                         success, data = db.verify_user(user, pwd)
                         if success:
                             st.session_state.auth_status = True
                             st.session_state.user_id = str(data['_id'])
                             st.session_state.username = data['username']
+                            st.session_state.auth_token = issue_token(st.session_state.user_id, data['username'])
+                            st.session_state.login_at = time.perf_counter()  # measured when the chat page renders
                             st.rerun()
                         else:
-                            st.error("❌ Invalid credentials!")
+                            st.error(f"❌ {data}" if data else "❌ Invalid credentials!")
                     else:
                         st.error("⚠️ Fill all fields!")
         
@@ -55,8 +70,8 @@ def show_auth_page():
                         elif len(new_pwd) < 6: st.error("⚠️ Password too short!")
                         elif new_pwd != confirm_pwd: st.error("❌ Passwords don't match!")
                         else:
-                            db = UserDatabase()
-                            success, msg = db.register_user(new_user, new_pwd)
+                            db = get_user_db()
+                            success, msg = db.register_user(new_user, new_pwd, client=st.context.ip_address)
                             if success: st.success(f"✅ {msg}")
                             else: st.error(f"❌ {msg}")
                     else:
@@ -64,25 +79,13 @@ def show_auth_page():
     
     return False
 
-def run_app():
-    os.system("streamlit run app.py")
-
-def redirect_to_app():
-    """✅ Runs app.py in a new tab using os.system"""
-    if st.session_state.get('auth_status') and not st.session_state.get('redirected'):
-        st.session_state.redirected = True
-        st.success("🎉 Login successful! Launching Document Vault...")
-
-        with st.spinner("Loading..."):
-            try:
-                # Run app.py in a separate thread so Streamlit doesn't freeze
-                threading.Thread(target=run_app, daemon=True).start()
-                st.info("📂 App launched in a new tab. If not opened, check your browser.")
-                st.stop()
-            except Exception as e:
-                st.error(f"Launch failed: {e}")
-
-# Main execution
+# Main execution: one Streamlit process routes between login and chat (no second server per login)
 if __name__ == "__main__":
-    if show_auth_page():
-        redirect_to_app()
\ No newline at end of file
+    metrics.mark_startup("router_first_run")
+    start_metrics_server()
+    if st.session_state.get('auth_status'):
+        show_account_sidebar()
+        page = st.navigation([st.Page(CHAT_PAGE, title="Chat", icon="🧠")], position="hidden")
+    else:
+        page = st.navigation([st.Page(show_auth_page, title="Login", icon="🔐")], position="hidden")
+    page.run()
\ No newline at end of file
@@ -0,0 +1,198 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+from collections import namedtuple
+
+import numpy as np
+
+from text_vectors import HashedTfidf
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Medicine FAQ retrieval (medicine.json intents): hashed TF-IDF pattern vectors, top-k cosine search
+# ----------------------------
+MEDICINE_PATHS = ["medicine.json"]
+MEDICINE_INDEX_PATH = os.getenv("MEDICINE_INDEX_PATH", "medicine_index.npz")
+MEDICINE_THRESHOLD = float(os.getenv("MEDICINE_THRESHOLD", 0.4))
+MEDICINE_INDEX_DTYPE = os.getenv("MEDICINE_INDEX_DTYPE", "float32")  # or "int8" (per-row scaled)
+INDEX_VERSION = 1
+
+MedicineIntent = namedtuple("MedicineIntent", ["tag", "patterns", "responses"])
+MedicineMatch = namedtuple("MedicineMatch", ["intent", "score"])
+
+
+def load_medicine_intents(paths=MEDICINE_PATHS):
+    """Intents with at least one pattern and one response, in file order."""
+    intents = []
+    for p in paths:
+        if not os.path.exists(p):
+            continue
+        with open(p, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        for n, it in enumerate(raw.get("intents", [])):
+            patterns = [s.strip() for s in it.get("patterns", []) if isinstance(s, str) and s.strip()]
+            responses = [s.strip() for s in it.get("responses", []) if isinstance(s, str) and s.strip()]
+            if patterns and responses:
+                intents.append(MedicineIntent(it.get("tag") or f"medicine_{n}", patterns, responses))
+    return intents
+
+
+def sources_digest(paths=MEDICINE_PATHS):
+    h = hashlib.sha256()
+    for p in paths:
+        if os.path.exists(p):
+            with open(p, "rb") as f:
+                h.update(f.read())
+    return h.hexdigest()
+
+
+def quantize_rows(matrix):
+    """int8 copy of `matrix` (features x rows) with one float32 scale per column (pattern)."""
+    scales = np.abs(matrix).max(axis=0) / 127.0
+    scales[scales == 0] = 1.0
+    return np.round(matrix / scales).astype(np.int8), scales.astype(np.float32)
+
+
+class MedicineIndex:
+    """Pattern vectors of every intent, searched by vectorized cosine similarity.
+
+    The matrix is stored feature-major (n_features x n_patterns), so a query only
+    reads the rows of the buckets it hashes to. An intent scores the best cosine
+    of any of its patterns. With dtype="int8" the matrix is quantized per pattern
+    (4x smaller, scores within ~1% of float32).
+    """
+
+    def __init__(self, intents, n_features=4096, dtype="float32", source_sha256=""):
+        self.intents = list(intents)
+        self.dtype = dtype
+        self.source_sha256 = source_sha256
+        labels, patterns = [], []
+        for i, intent in enumerate(self.intents):
+            for pattern in intent.patterns:
+                labels.append(i)
+                patterns.append(pattern)
+        self.vectorizer = HashedTfidf(n_features)
+        matrix = self.vectorizer.fit_transform(patterns).T if patterns else np.zeros((n_features, 0), np.float32)
+        self._set_matrix(np.ascontiguousarray(matrix), np.array(labels, dtype=np.int64))
+
+    def _set_matrix(self, matrix, labels):
+        if self.dtype == "int8":
+            if matrix.dtype != np.int8:
+                matrix, self.scales = quantize_rows(matrix)
+            self.matrix = matrix
+        elif self.dtype == "float32":
+            self.matrix, self.scales = matrix.astype(np.float32, copy=False), None
+        else:
+            raise ValueError(f"unsupported index dtype {self.dtype!r} (use float32 or int8)")
+        self.labels = labels
+        # rows grouped by intent (labels are ascending) for np.maximum.reduceat
+        self.offsets = np.searchsorted(labels, np.arange(len(self.intents)))
+
+    # ----------------------------
+    # On-disk index
+    # ----------------------------
+    def save(self, path=MEDICINE_INDEX_PATH):
+        meta = {
+            "version": INDEX_VERSION, "source_sha256": self.source_sha256, "dtype": self.dtype,
+            "n_features": self.vectorizer.n_features, "intents": [i._asdict() for i in self.intents],
+        }
+        arrays = {"matrix": self.matrix, "labels": self.labels, "idf": self.vectorizer.idf,
+                  "meta": np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8)}
+        if self.scales is not None:
+            arrays["scales"] = self.scales
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, **arrays)  # the hashed matrix is mostly zeros
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=MEDICINE_INDEX_PATH):
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            if meta.get("version") != INDEX_VERSION:
+                raise ValueError(f"{path}: index version {meta.get('version')}, expected {INDEX_VERSION}")
+            index = cls.__new__(cls)
+            index.intents = [MedicineIntent(**i) for i in meta["intents"]]
+            index.dtype = meta["dtype"]
+            index.source_sha256 = meta["source_sha256"]
+            index.vectorizer = HashedTfidf(meta["n_features"])
+            index.vectorizer.idf = data["idf"]
+            index.scales = data["scales"] if "scales" in data else None
+            index._set_matrix(data["matrix"], data["labels"])
+        return index
+
+    # ----------------------------
+    # Search
+    # ----------------------------
+    def scores(self, text: str):
+        """Best cosine per intent."""
+        if not len(self.labels):
+            return np.zeros(len(self.intents), dtype=np.float32)
+        features, q = self.vectorizer.transform_one(text)
+        if self.scales is None:
+            sims = q @ self.matrix[features]
+        else:
+            sims = (q @ self.matrix[features].astype(np.float32)) * self.scales
+        return np.maximum.reduceat(sims, self.offsets)
+
+    def top_k(self, text: str, k: int = 3):
+        """Up to k MedicineMatch, best first."""
+        scores = self.scores(text)
+        k = min(k, len(scores))
+        if not k:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [MedicineMatch(self.intents[i], float(scores[i])) for i in top]
+
+    @span("medicine_match")
+    def match(self, text: str, threshold: float = MEDICINE_THRESHOLD):
+        """Best intent if it clears `threshold`, else None."""
+        best = self.top_k(text, 1)
+        return best[0] if best and best[0].score >= threshold else None
+
+    @staticmethod
+    def respond(intent: MedicineIntent):
+        return random.choice(intent.responses).replace("\n", "<br>")
+
+
+def build_medicine_index(paths=MEDICINE_PATHS, dtype=MEDICINE_INDEX_DTYPE):
+    return MedicineIndex(load_medicine_intents(paths), dtype=dtype, source_sha256=sources_digest(paths))
+
+
+def load_medicine_index(path=MEDICINE_INDEX_PATH, paths=MEDICINE_PATHS, dtype=MEDICINE_INDEX_DTYPE):
+    """The saved index when it was built from the current files with `dtype`; otherwise rebuild and save it."""
+    digest = sources_digest(paths)
+    if path and os.path.exists(path):
+        try:
+            index = MedicineIndex.load(path)
+            if index.source_sha256 == digest and index.dtype == dtype:
+                return index
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Rebuilding medicine index (%s: %s)", path, e)
+    index = build_medicine_index(paths, dtype)
+    if path:
+        try:
+            index.save(path)
+        except OSError as e:
+            logger.warning("Could not save medicine index to %s: %s", path, e)
+    return index
+
+
+# ----------------------------
+# Build step: python medicine_index.py [--dtype int8] [--out medicine_index.npz]
+# ----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the medicine FAQ retrieval index")
+    parser.add_argument("--dtype", default=MEDICINE_INDEX_DTYPE, choices=["float32", "int8"])
+    parser.add_argument("--out", default=MEDICINE_INDEX_PATH)
+    args = parser.parse_args()
+
+    index = build_medicine_index(dtype=args.dtype)
+    index.save(args.out)
+    print(f"✅ Wrote {args.out}: {len(index.intents)} intents, {len(index.labels)} patterns, "
+          f"{index.dtype}, {os.path.getsize(args.out) / 1024:.1f} KiB")
@@ -0,0 +1,180 @@
+import json
+import logging
+import os
+import random
+from collections import namedtuple
+
+import numpy as np
+
+from keyword_matcher import KeywordMatcher
+from text_vectors import HashedTfidf, tokenize
+from tracing import span
+
+# ----------------------------
+# Conversational / emotional-support intents (text.json "mental_chat"), answered without the LLM
+# ----------------------------
+MENTAL_CHAT_PATHS = ["text.json"]
+MENTAL_CHAT_THRESHOLD = float(os.getenv("MENTAL_CHAT_THRESHOLD", 0.55))
+
+# knowledge-base condition whose doctors are offered when an intent sets escalate_to_doctor
+ESCALATION_DISEASES = {
+    "panic": "Panic Attack",
+    "fear": "Anxiety Disorder",
+    "anxiety": "Anxiety Disorder",
+    "overthinking": "Anxiety Disorder",
+    "trauma": "PTSD",
+    "triggers": "PTSD",
+    "intrusive_thoughts": "OCD",
+    "fatigue": "Insomnia",
+}
+DEFAULT_ESCALATION = "Depression"
+CRISIS_MESSAGE = (
+    "If you are thinking about ending your life or are in danger, please call <b>Tele-MANAS 14416</b> "
+    "(free, 24x7) or emergency services at <b>112</b> right now. You deserve support."
+)
+# unambiguous self-harm phrases: answered with the crisis intent before any other route (whole words, any case)
+CRISIS_PHRASES = [
+    "suicide", "suicidal", "kill myself", "killing myself", "end my life", "ending my life", "take my own life",
+    "want to die", "wanna die", "better off dead", "hurt myself", "harm myself", "self harm", "self-harm",
+    "cut myself", "no reason to live", "don't want to live", "dont want to live", "end it all",
+]
+CRISIS_TAG = "suicidal_1"  # text.json intent used for crisis phrases (any crisis intent if missing)
+
+logger = logging.getLogger(__name__)
+
+Intent = namedtuple("Intent", ["id", "tag", "patterns", "responses", "category", "emotion_hint", "escalate", "crisis"])
+ChatMatch = namedtuple("ChatMatch", ["intent", "score"])
+
+
+def normalize(text: str) -> str:
+    return " ".join(tokenize(text))
+
+
+def _strings(value):
+    if not isinstance(value, list):
+        return []
+    return [v.strip() for v in value if isinstance(v, str) and v.strip()]
+
+
+def load_mental_chat(paths=MENTAL_CHAT_PATHS):
+    """Validated intents from text.json-style files, plus a list of skipped-record problems.
+
+    Raises ValueError when a file is not valid JSON or has no "mental_chat" list.
+    """
+    intents, problems = [], []
+    for p in paths:
+        if not os.path.exists(p):
+            continue
+        with open(p, "r", encoding="utf-8") as f:
+            try:
+                raw = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{p}: {e}") from e
+        records = raw.get("mental_chat") if isinstance(raw, dict) else None
+        if not isinstance(records, list):
+            raise ValueError(f"{p}: expected a top-level \"mental_chat\" list")
+        for n, rec in enumerate(records):
+            where = f"{p} #{rec.get('id', n) if isinstance(rec, dict) else n}"
+            if not isinstance(rec, dict):
+                problems.append(f"{where}: not an object")
+                continue
+            patterns, responses = _strings(rec.get("patterns")), _strings(rec.get("responses"))
+            if not patterns or not responses:
+                problems.append(f"{where}: needs non-empty patterns and responses")
+                continue
+            escalate = rec.get("escalate_to_doctor", False)
+            if not isinstance(escalate, bool):
+                problems.append(f"{where}: escalate_to_doctor must be true/false")
+                continue
+            intents.append(Intent(
+                rec.get("id", n), rec.get("tag") or f"intent_{n}", patterns, responses,
+                rec.get("category") or "", rec.get("emotion_hint") or "", escalate,
+                bool(rec.get("suicide_risk")) or rec.get("emotion_hint") == "crisis",
+            ))
+    return intents, problems
+
+
+class MentalChat:
+    """Compiled pattern index over mental_chat intents.
+
+    Messages whose normalized tokens equal a pattern's are answered from a dict;
+    otherwise an intent scores the best cosine of any of its patterns. The
+    pattern matrix is kept as sparse columns (feature -> rows), so scoring only
+    touches the features present in the message.
+    """
+
+    def __init__(self, intents, n_features=4096):
+        self.intents = list(intents)
+        self.exact = {}
+        labels, patterns = [], []
+        for i, intent in enumerate(self.intents):
+            for pattern in intent.patterns:
+                self.exact.setdefault(normalize(pattern), i)
+                labels.append(i)
+                patterns.append(pattern)
+        self.exact.pop("", None)
+        crisis = [it for it in self.intents if it.crisis]
+        self.crisis_intent = next((it for it in crisis if it.tag == CRISIS_TAG), crisis[0] if crisis else Intent(
+            "crisis", "crisis", [], ["I'm really sorry you're feeling this way. You don't have to go through it alone."],
+            "", "crisis", True, True))
+        self.crisis_matcher = KeywordMatcher()
+        for phrase in CRISIS_PHRASES:
+            self.crisis_matcher.add(phrase, "crisis")
+        self.crisis_matcher.build()
+
+        # rows grouped by intent (labels are already ascending) for np.maximum.reduceat
+        self.offsets = np.searchsorted(np.array(labels, dtype=np.int64), np.arange(len(self.intents)))
+        self.n_rows = len(patterns)
+        self.vectorizer = HashedTfidf(n_features)
+        if patterns:
+            dense = self.vectorizer.fit_transform(patterns).T  # features x rows
+            cols, rows = np.nonzero(dense)
+            self.data = dense[cols, rows]
+            self.rows = rows.astype(np.int32)
+            self.indptr = np.searchsorted(cols, np.arange(n_features + 1))
+        else:
+            self.data, self.rows, self.indptr = np.zeros(0, np.float32), np.zeros(0, np.int32), np.zeros(n_features + 1, np.int64)
+
+    @classmethod
+    def from_files(cls, paths=MENTAL_CHAT_PATHS):
+        intents, problems = load_mental_chat(paths)
+        for problem in problems:
+            logger.warning("Skipped mental_chat intent: %s", problem)
+        return cls(intents)
+
+    def crisis(self, text: str):
+        """The crisis intent when the message contains a self-harm phrase, else None."""
+        if self.crisis_matcher.find((text or "").replace("\u2019", "'")):
+            return self.crisis_intent
+        return None
+
+    def scores(self, text: str):
+        if not self.intents:
+            return np.zeros(0, dtype=np.float32)
+        features, q = self.vectorizer.transform_one(text)
+        starts, ends = self.indptr[features], self.indptr[features + 1]
+        if not (ends - starts).any():
+            return np.zeros(len(self.intents), dtype=np.float32)
+        idx = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+        weights = self.data[idx] * np.repeat(q, ends - starts)
+        sims = np.bincount(self.rows[idx], weights=weights, minlength=self.n_rows)
+        return np.maximum.reduceat(sims, self.offsets)
+
+    @span("mental_chat_match")
+    def match(self, text: str, threshold: float = MENTAL_CHAT_THRESHOLD):
+        """Best intent if it clears `threshold` (exact token matches score 1.0), else None."""
+        i = self.exact.get(normalize(text))
+        if i is not None:
+            return ChatMatch(self.intents[i], 1.0)
+        scores = self.scores(text)
+        if not len(scores):
+            return None
+        best = int(np.argmax(scores))
+        return ChatMatch(self.intents[best], float(scores[best])) if scores[best] >= threshold else None
+
+    @staticmethod
+    def respond(intent: Intent):
+        html = random.choice(intent.responses)
+        if intent.crisis:
+            html += f"<br><br>🆘 {CRISIS_MESSAGE}"
+        return html
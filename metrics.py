@@ -0,0 +1,204 @@
+import bisect
+import threading
+import time
+from collections import deque
+
+# ----------------------------
+# Per-response latency metrics (time to first paint + total render time)
+# ----------------------------
+RECENT_LIMIT = 500
+# approximate process start: this module is imported by the first page script
+PROCESS_STARTED = time.time()
+
+_recent = deque(maxlen=RECENT_LIMIT)
+_lock = threading.Lock()
+
+
+def record_response(route: str, ttfb: float, total: float):
+    with _lock:
+        _recent.append({"route": route, "ttfb": ttfb, "total": total, "at": time.time()})
+    observe("chat_ttfb_seconds", ttfb, route=route)
+    observe("chat_response_seconds", total, route=route)
+
+
+def recent_responses():
+    with _lock:
+        return list(_recent)
+
+
+def summary():
+    """Per-route count and mean/max TTFB and total render time over the recent window."""
+    out = {}
+    for r in recent_responses():
+        s = out.setdefault(r["route"], {"count": 0, "ttfb_sum": 0.0, "total_sum": 0.0, "ttfb_max": 0.0, "total_max": 0.0})
+        s["count"] += 1
+        s["ttfb_sum"] += r["ttfb"]
+        s["total_sum"] += r["total"]
+        s["ttfb_max"] = max(s["ttfb_max"], r["ttfb"])
+        s["total_max"] = max(s["total_max"], r["total"])
+    for s in out.values():
+        s["ttfb_mean"] = s.pop("ttfb_sum") / s["count"]
+        s["total_mean"] = s.pop("total_sum") / s["count"]
+    return out
+
+
+# ----------------------------
+# Per-call timings for LLM calls (see orchestrator.py)
+# ----------------------------
+_calls = deque(maxlen=RECENT_LIMIT)
+
+
+def record_call(label: str, seconds: float, ok: bool):
+    with _lock:
+        _calls.append({"label": label, "seconds": seconds, "ok": ok, "at": time.time()})
+    observe("llm_call_seconds", seconds, call=label, ok=str(ok).lower())
+
+
+def recent_calls():
+    with _lock:
+        return list(_calls)
+
+
+# ----------------------------
+# Startup and page-switch timings
+# ----------------------------
+_startup = {}
+_timings = deque(maxlen=RECENT_LIMIT)
+
+
+def mark_startup(event: str):
+    """Seconds from process start to the first occurrence of `event`."""
+    with _lock:
+        _startup.setdefault(event, time.time() - PROCESS_STARTED)
+
+
+def startup_events():
+    with _lock:
+        return dict(_startup)
+
+
+def record_timing(name: str, seconds: float):
+    with _lock:
+        _timings.append({"name": name, "seconds": seconds, "at": time.time()})
+
+
+def recent_timings(name: str = None):
+    with _lock:
+        return [t for t in _timings if name is None or t["name"] == name]
+
+
+# ----------------------------
+# Cumulative histograms and counters, exported as Prometheus text or JSON
+# ----------------------------
+# Fixed buckets keep observe() to a bisect and two additions under a lock.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+HELP = {
+    "chat_ttfb_seconds": "Time to the first chunk of a chat reply, by route.",
+    "chat_response_seconds": "Total time to produce a chat reply, by route.",
+    "llm_call_seconds": "Duration of orchestrated LLM calls.",
+    "stage_seconds": "Duration of one pipeline stage (see tracing.span).",
+    "llm_tokens_total": "LLM tokens used, by call and direction.",
+    "llm_errors_total": "Failed LLM calls, by call and exception type.",
+    "classify_prompts_truncated_total": "Classifier prompts that dropped candidates or symptom text to fit the token budget.",
+}
+
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+_counters = {}  # (name, labels) -> value
+_errors = deque(maxlen=50)
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def observe(name: str, seconds: float, **labels):
+    key = _key(name, labels)
+    i = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        h[i] += 1
+        h[-1] += seconds
+
+
+def increment(name: str, value: float = 1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def record_error(call: str, error: BaseException):
+    """Count a failed LLM call and keep its message in the recent-errors list."""
+    increment("llm_errors_total", call=call, error=type(error).__name__)
+    with _lock:
+        _errors.append({"call": call, "error": type(error).__name__, "message": str(error)[:300], "at": time.time()})
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def prometheus_text():
+    """All histograms and counters in the Prometheus text exposition format."""
+    with _lock:
+        histograms = {k: list(v) for k, v in _histograms.items()}
+        counters = dict(_counters)
+    lines, seen = [], set()
+
+    def header(name, kind):
+        if name not in seen:
+            seen.add(name)
+            if name in HELP:
+                lines.append(f"# HELP {name} {HELP[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), h in sorted(histograms.items()):
+        header(name, "histogram")
+        cumulative = 0
+        for bound, n in zip(BUCKETS + ("+Inf",), h[:-1]):
+            cumulative += n
+            lines.append(f"{name}_bucket{_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {h[-1]:.6f}")
+        lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+    for (name, labels), value in sorted(counters.items()):
+        header(name, "counter")
+        lines.append(f"{name}{_labels(labels)} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+def histogram_quantile(counts, q):
+    """Upper bound of the bucket holding quantile q; None when empty or beyond the last bucket."""
+    total = sum(counts)
+    seen = 0
+    for bound, n in zip(BUCKETS, counts):
+        seen += n
+        if total and seen >= q * total:
+            return bound
+    return None
+
+
+def export_json():
+    """Histograms (count, sum, bucketed p50/p95/p99), counters and recent LLM errors."""
+    with _lock:
+        histograms = {k: list(v) for k, v in _histograms.items()}
+        counters = dict(_counters)
+        errors = list(_errors)
+    out = {"histograms": [], "counters": [], "recent_errors": errors}
+    for (name, labels), h in sorted(histograms.items()):
+        counts = h[:-1]
+        out["histograms"].append({
+            "name": name, "labels": dict(labels), "count": sum(counts), "sum": h[-1],
+            "p50": histogram_quantile(counts, 0.5), "p95": histogram_quantile(counts, 0.95),
+            "p99": histogram_quantile(counts, 0.99),
+        })
+    for (name, labels), value in sorted(counters.items()):
+        out["counters"].append({"name": name, "labels": dict(labels), "value": value})
+    return out
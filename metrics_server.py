@@ -0,0 +1,64 @@
+import hmac
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import metrics
+import tracing
+
+# ----------------------------
+# /metrics for the Streamlit process (api.py serves its own)
+# ----------------------------
+# Streamlit owns its HTTP server, so stages recorded while painting the chat (render_history, paint, every
+# reply served by app.py) are exported from a sidecar thread instead. Set METRICS_PORT to turn it on.
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))  # 0 = off
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+_server = None
+_server_lock = threading.Lock()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):  # scrapes would flood the Streamlit log
+        pass
+
+    def _send(self, status, body, content_type):
+        body = body.encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the scraper gave up
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path != "/metrics":
+            return self._send(404, json.dumps({"error": "Not found."}), "application/json")
+        auth = self.headers.get("Authorization", "")
+        token = auth[7:].strip() if auth.lower().startswith("bearer ") else ""
+        if METRICS_TOKEN and not hmac.compare_digest(token, METRICS_TOKEN):
+            return self._send(401, json.dumps({"error": "Missing or invalid metrics token."}), "application/json")
+        if parse_qs(url.query).get("format") == ["json"]:
+            payload = dict(metrics.export_json(), slow_requests=tracing.slow_requests())
+            return self._send(200, json.dumps(payload, ensure_ascii=False), "application/json")
+        self._send(200, metrics.prometheus_text(), "text/plain; version=0.0.4; charset=utf-8")
+
+
+def start_metrics_server(port=None, host=None):
+    """Serve /metrics in a daemon thread, once per process; returns the server, or None when METRICS_PORT is unset."""
+    global _server
+    port = METRICS_PORT if port is None else port
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host or METRICS_HOST, port), MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
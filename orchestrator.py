@@ -0,0 +1,80 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import metrics
+
+# ----------------------------
+# Bounded thread pool for Cohere calls (shared by all sessions)
+# ----------------------------
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", 20))
+
+
+class CallOrchestrator:
+    """Runs LLM calls on a bounded pool so independent calls overlap.
+
+    Every call is timed into metrics.record_call() and runs in the caller's
+    context, so its spans join the caller's request trace. Waiting is bounded by
+    a per-call timeout; a timed-out call keeps running in the pool (threads
+    can't be killed) but its result is ignored.
+    """
+
+    def __init__(self, max_workers=LLM_MAX_CONCURRENCY, timeout=LLM_CALL_TIMEOUT):
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+
+    def submit(self, label: str, fn, *args, **kwargs):
+        def timed():
+            started = time.perf_counter()
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            except Exception as e:
+                metrics.record_error(label, e)
+                raise
+            finally:
+                metrics.record_call(label, time.perf_counter() - started, ok)
+
+        future = self._pool.submit(contextvars.copy_context().run, timed)
+        future.label = label
+        return future
+
+    def wait(self, future, timeout=None, default=None):
+        """Result of `future`, or `default` if it failed or did not finish within the timeout."""
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeout:
+            future.cancel()
+            metrics.increment("llm_timeouts_total", call=getattr(future, "label", ""))
+            return default
+        except Exception:
+            return default
+
+    def run(self, label: str, fn, *args, timeout=None, default=None, **kwargs):
+        return self.wait(self.submit(label, fn, *args, **kwargs), timeout=timeout, default=default)
+
+    def discard(self, future):
+        """Drop a speculative call: cancel it if it has not started, otherwise let it finish unobserved."""
+        if future is not None:
+            future.cancel()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_orchestrator = None
+_orchestrator_lock = threading.Lock()
+
+
+def get_orchestrator():
+    global _orchestrator
+    with _orchestrator_lock:
+        if _orchestrator is None:
+            _orchestrator = CallOrchestrator()
+        return _orchestrator
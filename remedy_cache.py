@@ -0,0 +1,197 @@
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# ----------------------------
+# Remedy response cache (keyed by disease, model and prompt version)
+# ----------------------------
+REMEDY_CACHE_PATH = os.getenv("REMEDY_CACHE_PATH", "remedy_cache.sqlite3")
+REMEDY_CACHE_TTL = float(os.getenv("REMEDY_CACHE_TTL", 7 * 24 * 3600))
+REMEDY_CACHE_MAX_ENTRIES = int(os.getenv("REMEDY_CACHE_MAX_ENTRIES", 2000))
+
+
+def cache_key(disease: str, model: str, prompt_version: str) -> str:
+    return f"{prompt_version}|{model}|{(disease or '').strip().lower()}"
+
+
+class MemoryBackend:
+    """In-process LRU with TTL. Lost on restart."""
+
+    def __init__(self, max_entries=REMEDY_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._items = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, ttl):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if ttl and time.time() - item[0] > ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = (time.time(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SQLiteBackend:
+    """On-disk LRU with TTL that survives restarts and is shared by worker processes."""
+
+    def __init__(self, path=REMEDY_CACHE_PATH, max_entries=REMEDY_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS remedies ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS remedies_used_at ON remedies(used_at)")
+        self._conn.commit()
+
+    def get(self, key, ttl):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, stored_at FROM remedies WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if ttl and now - row[1] > ttl:
+                self._conn.execute("DELETE FROM remedies WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE remedies SET used_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO remedies (key, value, stored_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM remedies WHERE key IN ("
+                " SELECT key FROM remedies ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM remedies")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM remedies").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+class RemedyCache:
+    def __init__(self, backend=None, ttl=REMEDY_CACHE_TTL):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, disease, model, prompt_version):
+        value = self.backend.get(cache_key(disease, model, prompt_version), self.ttl)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, disease, model, prompt_version, value):
+        self.backend.set(cache_key(disease, model, prompt_version), value)
+
+    def get_or_create(self, disease, model, prompt_version, create):
+        value = self.get(disease, model, prompt_version)
+        if value is None:
+            value = create(disease)
+            self.set(disease, model, prompt_version, value)
+        return value
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self.backend),
+        }
+
+
+_remedy_cache = None
+_remedy_cache_lock = threading.Lock()
+
+
+def get_remedy_cache():
+    """Process-wide cache on the SQLite backend (falls back to memory if the file can't be opened)."""
+    global _remedy_cache
+    with _remedy_cache_lock:
+        if _remedy_cache is None:
+            try:
+                backend = SQLiteBackend()
+            except sqlite3.Error:
+                backend = MemoryBackend()
+            _remedy_cache = RemedyCache(backend)
+        return _remedy_cache
+
+
+# ----------------------------
+# Offline warm-up: python remedy_cache.py --warm
+# ----------------------------
+def warm(force=False):
+    from knowledge_base import load_knowledge_base
+    from llm import COHERE_MODEL, REMEDY_PROMPT_VERSION, generate_remedies
+
+    cache = get_remedy_cache()
+    names = sorted(set(load_knowledge_base().disease_names))
+    filled = failed = 0
+    for name in names:
+        if not force and cache.get(name, COHERE_MODEL, REMEDY_PROMPT_VERSION) is not None:
+            continue
+        try:
+            cache.set(name, COHERE_MODEL, REMEDY_PROMPT_VERSION, generate_remedies(name))
+            filled += 1
+        except Exception as e:
+            failed += 1
+            print(f"⚠️ {name}: {e}")
+    print(f"✅ Warmed {filled} of {len(names)} diseases ({failed} failed). {cache.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remedy cache maintenance")
+    parser.add_argument("--warm", action="store_true", help="generate remedies for every disease in the knowledge base")
+    parser.add_argument("--force", action="store_true", help="regenerate entries that are already cached")
+    parser.add_argument("--clear", action="store_true", help="drop all cached remedies")
+    args = parser.parse_args()
+    if args.clear:
+        get_remedy_cache().backend.clear()
+    if args.warm:
+        warm(force=args.force)
+    print(get_remedy_cache().stats())
@@ -0,0 +1,196 @@
+import os
+import random
+import threading
+import time
+
+import httpx
+
+import metrics
+
+# ----------------------------
+# Resilient LLM client: per-call deadlines, jittered retries, a concurrency limit and a circuit breaker
+# ----------------------------
+# Wraps anything with cohere.Client's chat()/chat_stream() (the real client, llm_stub clients).
+# While the circuit is open calls fail fast with LLMUnavailable and the app answers from local data.
+COHERE_DEADLINE = float(os.getenv("COHERE_DEADLINE", 15))  # seconds per call, retries included
+COHERE_RETRIES = int(os.getenv("COHERE_RETRIES", 2))
+COHERE_BACKOFF = float(os.getenv("COHERE_BACKOFF", 0.25))  # first retry waits up to this, doubling after
+COHERE_MAX_CONCURRENCY = int(os.getenv("COHERE_MAX_CONCURRENCY", 8))
+BREAKER_FAILURES = int(os.getenv("COHERE_BREAKER_FAILURES", 5))  # consecutive failed calls that open the circuit
+BREAKER_COOLDOWN = float(os.getenv("COHERE_BREAKER_COOLDOWN", 30))  # seconds before a trial call is let through
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class LLMUnavailable(Exception):
+    """The call was not attempted: the circuit is open or no slot freed up before the deadline."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transient failures worth another attempt (and that count against the circuit breaker)."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return isinstance(error, (TimeoutError, ConnectionError, httpx.TimeoutException, httpx.NetworkError,
+                              httpx.RemoteProtocolError))
+
+
+class CircuitBreaker:
+    """closed -> open after `failures` consecutive failures; after `cooldown` seconds one trial
+    call is let through (half-open) and its outcome closes or re-opens the circuit."""
+
+    def __init__(self, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN, clock=time.monotonic):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.clock = clock
+        self._consecutive = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half_open" if self.clock() - self._opened_at >= self.cooldown else "open"
+
+    def available(self) -> bool:
+        """True when a call would be let through now (closed, or half-open with the trial slot free)."""
+        with self._lock:
+            return self._opened_at is None or (self.clock() - self._opened_at >= self.cooldown and not self._trial)
+
+    def allow(self) -> bool:
+        """True if a call may go out now (claims the single trial slot when half-open)."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self.clock() - self._opened_at < self.cooldown or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive += 1
+            if self._trial or (self._opened_at is None and self._consecutive >= self.failures):
+                if self._opened_at is None:
+                    metrics.increment("llm_circuit_opened_total")
+                self._opened_at = self.clock()
+            self._trial = False
+
+    def release(self):
+        """Give back a trial slot that was not used for a real attempt."""
+        with self._lock:
+            self._trial = False
+
+
+class ResilientClient:
+    """chat()/chat_stream() with the same signature as cohere.Client, made safe to call from UI threads.
+
+    Each call gets `deadline` seconds in total: waiting for a concurrency slot,
+    every attempt (the remaining time is passed to the SDK as its request
+    timeout) and the jittered backoff between attempts. Streams are only
+    retried before their first event, and a stream that outlives the deadline
+    is abandoned with a TimeoutError.
+    """
+
+    def __init__(self, client, deadline=COHERE_DEADLINE, retries=COHERE_RETRIES, backoff=COHERE_BACKOFF,
+                 max_concurrency=COHERE_MAX_CONCURRENCY, breaker=None, sleep=time.sleep):
+        self.client = client
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def available(self) -> bool:
+        """False while calls would be refused: callers should answer from local data instead."""
+        return self.breaker.available()
+
+    def _admit(self, ends):
+        if not self.breaker.allow():
+            metrics.increment("llm_rejected_total", reason="circuit_open")
+            raise LLMUnavailable("Cohere is unavailable (circuit open)")
+        if not self._slots.acquire(timeout=max(ends - time.monotonic(), 0)):
+            self.breaker.release()
+            metrics.increment("llm_rejected_total", reason="busy")
+            raise LLMUnavailable("No Cohere call slot became free before the deadline")
+
+    def _backoff(self, attempt, ends):
+        """Sleep before retry `attempt` (1-based); False when the deadline leaves no time for it."""
+        delay = random.uniform(0, self.backoff * 2 ** (attempt - 1))
+        if time.monotonic() + delay >= ends:
+            return False
+        metrics.increment("llm_retries_total")
+        self.sleep(delay)
+        return True
+
+    @staticmethod
+    def _request_options(kwargs, ends):
+        options = dict(kwargs.pop("request_options", None) or {})
+        options["timeout_in_seconds"] = max(ends - time.monotonic(), 0.001)
+        return options
+
+    def chat(self, model=None, message="", **kwargs):
+        ends = time.monotonic() + self.deadline
+        self._admit(ends)
+        try:
+            attempt = 0
+            while True:
+                try:
+                    resp = self.client.chat(model=model, message=message,
+                                            request_options=self._request_options(kwargs, ends), **kwargs)
+                except Exception as e:
+                    attempt += 1
+                    if is_retryable(e) and attempt <= self.retries and self._backoff(attempt, ends):
+                        continue
+                    if is_retryable(e):
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()  # the service answered; the request itself was wrong
+                    raise
+                self.breaker.record_success()
+                return resp
+        finally:
+            self._slots.release()
+
+    def chat_stream(self, model=None, message="", **kwargs):
+        ends = time.monotonic() + self.deadline
+        self._admit(ends)
+        try:
+            attempt = 0
+            while True:
+                started = False
+                try:
+                    stream = self.client.chat_stream(model=model, message=message,
+                                                     request_options=self._request_options(kwargs, ends), **kwargs)
+                    for event in stream:
+                        started = True
+                        yield event
+                        if time.monotonic() > ends:
+                            raise TimeoutError(f"Cohere stream exceeded its {self.deadline:g}s deadline")
+                except GeneratorExit:
+                    # the caller stopped reading (e.g. after the first line): the service did answer
+                    self.breaker.record_success()
+                    raise
+                except Exception as e:
+                    attempt += 1
+                    if is_retryable(e) and not started and attempt <= self.retries and self._backoff(attempt, ends):
+                        continue
+                    if is_retryable(e):
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    raise
+                self.breaker.record_success()
+                return
+        finally:
+            self._slots.release()
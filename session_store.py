@@ -0,0 +1,405 @@
+import hashlib
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+# ----------------------------
+# Chat session state shared by workers: {"messages": [...], "pending_disease": ..., ...}
+# ----------------------------
+# SESSION_STORE_URL picks the backend:
+#   sqlite:///sessions.sqlite3  (default) survives restarts, shared by workers on one host
+#   redis://host:6379/0         shared by replicas on several hosts (pip install redis)
+#   fakeredis://                local Redis stand-in for tests (pip install fakeredis)
+#   memory://                   private to one process, lost on restart
+SESSION_STORE_URL = os.getenv("SESSION_STORE_URL", "sqlite:///sessions.sqlite3")
+SESSION_STATE_TTL = float(os.getenv("SESSION_STATE_TTL", 24 * 3600))
+SESSION_STATE_MAX_ENTRIES = int(os.getenv("SESSION_STATE_MAX_ENTRIES", 10000))
+
+# fields that are persisted; list fields are stored item by item so new messages are appended, not rewritten
+SESSION_FIELDS = ("messages", "pending_disease", "offered_disease", "conversation_id", "persisted_count", "user")
+LIST_FIELDS = {"messages"}
+COMPRESS_OVER = 512  # bytes of JSON before a value is zlib-compressed
+
+
+def new_session_id():
+    return secrets.token_urlsafe(16)
+
+
+def encode(value) -> bytes:
+    """Compact JSON, zlib-compressed (with a b"z" tag) when large. JSON never starts with "z"."""
+    raw = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if len(raw) > COMPRESS_OVER:
+        packed = b"z" + zlib.compress(raw, 6)
+        if len(packed) < len(raw):
+            return packed
+    return raw
+
+
+def decode(blob: bytes):
+    if blob[:1] == b"z":
+        blob = zlib.decompress(blob[1:])
+    return json.loads(blob)
+
+
+def _digest(blob: bytes) -> bytes:
+    return hashlib.blake2b(blob, digest_size=16).digest()
+
+
+# ----------------------------
+# Backends: read(session_id, ttl) -> (version, {field: blob}, {list field: [blobs]}) | None
+#           write(session_id, base_version, values, appends) -> new version | None on a version conflict
+# ----------------------------
+# `values` maps a field to a blob, or a list field to its complete item list (replace);
+# `appends` maps a list field to items to add at the end. base_version=None writes unconditionally.
+
+
+class MemoryBackend:
+    """In-process LRU with TTL. Lost on restart and private to one worker."""
+
+    def __init__(self, max_entries=SESSION_STATE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._items = OrderedDict()  # session_id -> [version, saved_at, {field: blob}, {field: [blobs]}]
+        self._lock = threading.Lock()
+
+    def read(self, session_id, ttl):
+        with self._lock:
+            item = self._items.get(session_id)
+            if item is None:
+                return None
+            if ttl and time.time() - item[1] > ttl:
+                del self._items[session_id]
+                return None
+            self._items.move_to_end(session_id)
+            return item[0], dict(item[2]), {f: list(v) for f, v in item[3].items()}
+
+    def write(self, session_id, base_version, values, appends):
+        with self._lock:
+            item = self._items.get(session_id)
+            if base_version is not None and (item[0] if item else 0) != base_version:
+                return None
+            if item is None:
+                item = self._items[session_id] = [0, 0.0, {}, {}]
+            for field, value in values.items():
+                if isinstance(value, list):
+                    item[3][field] = list(value)
+                else:
+                    item[2][field] = value
+            for field, items in appends.items():
+                item[3].setdefault(field, []).extend(items)
+            item[0] += 1
+            item[1] = time.time()
+            self._items.move_to_end(session_id)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+            return item[0]
+
+    def delete(self, session_id):
+        with self._lock:
+            self._items.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SQLiteBackend:
+    """On-disk store that survives restarts and is shared by worker processes on one host."""
+
+    PURGE_EVERY = 1000  # writes between sweeps of expired sessions
+
+    def __init__(self, path="sessions.sqlite3", ttl=SESSION_STATE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY, version INTEGER NOT NULL, updated_at REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions(updated_at);
+            CREATE TABLE IF NOT EXISTS session_fields (
+                session_id TEXT NOT NULL, field TEXT NOT NULL, value BLOB NOT NULL,
+                PRIMARY KEY (session_id, field)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS session_items (
+                session_id TEXT NOT NULL, field TEXT NOT NULL, seq INTEGER NOT NULL, value BLOB NOT NULL,
+                PRIMARY KEY (session_id, field, seq)) WITHOUT ROWID;
+            """
+        )
+        self._conn.commit()
+
+    def read(self, session_id, ttl):
+        with self._lock:
+            row = self._conn.execute("SELECT version, updated_at FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            if ttl and time.time() - row[1] > ttl:
+                self._delete(session_id)
+                self._conn.commit()
+                return None
+            fields = dict(self._conn.execute("SELECT field, value FROM session_fields WHERE session_id = ?", (session_id,)))
+            lists = {}
+            for field, value in self._conn.execute(
+                "SELECT field, value FROM session_items WHERE session_id = ? ORDER BY field, seq", (session_id,)
+            ):
+                lists.setdefault(field, []).append(value)
+            return row[0], fields, lists
+
+    def write(self, session_id, base_version, values, appends):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if base_version is not None and (row[0] if row else 0) != base_version:
+                return None
+            version = (row[0] if row else 0) + 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, version, updated_at) VALUES (?, ?, ?)", (session_id, version, now)
+            )
+            for field, value in values.items():
+                if isinstance(value, list):
+                    self._conn.execute("DELETE FROM session_items WHERE session_id = ? AND field = ?", (session_id, field))
+                    self._insert_items(session_id, field, 0, value)
+                else:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO session_fields (session_id, field, value) VALUES (?, ?, ?)",
+                        (session_id, field, value),
+                    )
+            for field, items in appends.items():
+                start = self._conn.execute(
+                    "SELECT COALESCE(MAX(seq) + 1, 0) FROM session_items WHERE session_id = ? AND field = ?", (session_id, field)
+                ).fetchone()[0]
+                self._insert_items(session_id, field, start, items)
+            self._writes += 1
+            if self.ttl and self._writes % self.PURGE_EVERY == 0:
+                self._purge(now - self.ttl)
+            self._conn.commit()
+            return version
+
+    def _insert_items(self, session_id, field, start, items):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO session_items (session_id, field, seq, value) VALUES (?, ?, ?, ?)",
+            [(session_id, field, start + i, value) for i, value in enumerate(items)],
+        )
+
+    def _delete(self, session_id):
+        self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        self._conn.execute("DELETE FROM session_fields WHERE session_id = ?", (session_id,))
+        self._conn.execute("DELETE FROM session_items WHERE session_id = ?", (session_id,))
+
+    def _purge(self, cutoff):
+        for (session_id,) in self._conn.execute("SELECT id FROM sessions WHERE updated_at < ?", (cutoff,)).fetchall():
+            self._delete(session_id)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._delete(session_id)
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+class RedisBackend:
+    """Redis (or any redis-py compatible client): one hash per session plus one list per list field.
+
+    Expiry is native (EXPIRE), refreshed on every write.
+    """
+
+    def __init__(self, client, ttl=SESSION_STATE_TTL, prefix="chat:session:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _keys(self, session_id):
+        key = self.prefix + session_id
+        return key, {field: f"{key}:{field}" for field in LIST_FIELDS}
+
+    def read(self, session_id, ttl):
+        key, list_keys = self._keys(session_id)
+        with self.client.pipeline(transaction=False) as pipe:
+            pipe.hgetall(key)
+            for list_key in list_keys.values():
+                pipe.lrange(list_key, 0, -1)
+            found, *items = pipe.execute()
+        if not found:
+            return None
+        found = {k.decode() if isinstance(k, bytes) else k: v for k, v in found.items()}
+        version = int(found.pop("_version", 0))
+        return version, found, {field: list(values) for field, values in zip(list_keys, items) if values}
+
+    def write(self, session_id, base_version, values, appends):
+        from redis.exceptions import WatchError
+
+        key, list_keys = self._keys(session_id)
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                version = int(pipe.hget(key, "_version") or 0)
+                if base_version is not None and version != base_version:
+                    pipe.unwatch()
+                    return None
+                pipe.multi()
+                fields = {f: v for f, v in values.items() if not isinstance(v, list)}
+                pipe.hset(key, mapping=dict(fields, _version=version + 1))
+                for field, items in values.items():
+                    if isinstance(items, list):
+                        pipe.delete(list_keys[field])
+                        if items:
+                            pipe.rpush(list_keys[field], *items)
+                for field, items in appends.items():
+                    if items:
+                        pipe.rpush(list_keys[field], *items)
+                if self.ttl:
+                    for k in [key, *list_keys.values()]:
+                        pipe.expire(k, int(self.ttl))
+                pipe.execute()
+            except WatchError:
+                return None
+        return version + 1
+
+    def delete(self, session_id):
+        key, list_keys = self._keys(session_id)
+        self.client.delete(key, *list_keys.values())
+
+    def __len__(self):
+        list_suffixes = tuple(f":{field}" for field in LIST_FIELDS)
+        keys = (k.decode() if isinstance(k, bytes) else k for k in self.client.scan_iter(match=self.prefix + "*"))
+        return sum(1 for k in keys if not k.endswith(list_suffixes))
+
+
+# ----------------------------
+# Store: serialization + dirty-field tracking on top of a backend
+# ----------------------------
+class SessionStore:
+    """Loads and saves session state, writing only what changed since this process last read or wrote it.
+
+    For every session it remembers the backend version and a digest per field
+    (for list fields: item count and digest of the last item). save() then
+    sends changed scalar fields and appends new list items; a list that shrank
+    or was replaced is rewritten. If another worker wrote in between (version
+    mismatch) the whole state is written instead.
+    """
+
+    def __init__(self, backend=None, ttl=SESSION_STATE_TTL, max_tracked=SESSION_STATE_MAX_ENTRIES):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl = ttl
+        self.max_tracked = max_tracked
+        self._known = OrderedDict()  # session_id -> (version, {field: digest | (count, last item digest)})
+        self._lock = threading.Lock()
+        self.bytes_written = 0
+
+    def _remember(self, session_id, version, fields):
+        with self._lock:
+            self._known[session_id] = (version, fields)
+            self._known.move_to_end(session_id)
+            while len(self._known) > self.max_tracked:
+                self._known.popitem(last=False)
+
+    @staticmethod
+    def _list_mark(blobs):
+        return (len(blobs), _digest(blobs[-1]) if blobs else None)
+
+    def load(self, session_id):
+        """Stored state for `session_id` (a new dict), or None if unknown or expired."""
+        row = self.backend.read(session_id, self.ttl)
+        if row is None:
+            return None
+        version, fields, lists = row
+        state = {field: decode(blob) for field, blob in fields.items()}
+        state.update({field: [decode(b) for b in blobs] for field, blobs in lists.items()})
+        marks = {field: _digest(blob) for field, blob in fields.items()}
+        marks.update({field: self._list_mark(blobs) for field, blobs in lists.items()})
+        self._remember(session_id, version, marks)
+        return state
+
+    def _changes(self, state, marks):
+        values, appends, new_marks = {}, {}, dict(marks)
+        for field in SESSION_FIELDS:
+            if field not in state:
+                continue
+            value = state[field]
+            if field in LIST_FIELDS:
+                items = list(value or [])
+                count, last = marks.get(field, (0, None))
+                if count <= len(items) and (count == 0 or _digest(encode(items[count - 1])) == last):
+                    if count == 0 and field not in marks:
+                        values[field] = [encode(v) for v in items]
+                    elif len(items) > count:
+                        appends[field] = [encode(v) for v in items[count:]]
+                    blobs = appends.get(field) or values.get(field) or []
+                    new_marks[field] = (len(items), _digest(blobs[-1]) if blobs else last)
+                else:
+                    values[field] = [encode(v) for v in items]
+                    new_marks[field] = self._list_mark(values[field])
+            else:
+                blob = encode(value)
+                digest = _digest(blob)
+                if marks.get(field) != digest:
+                    values[field] = blob
+                    new_marks[field] = digest
+        return values, appends, new_marks
+
+    def save(self, session_id, state):
+        """Persist the SESSION_FIELDS present in `state` (any mapping, e.g. st.session_state)."""
+        with self._lock:
+            known = self._known.get(session_id)
+        version, marks = known if known else (None, {})
+        values, appends, new_marks = self._changes(state, marks)
+        if known and not values and not appends:
+            return
+        written = self.backend.write(session_id, version, values, appends)
+        if written is None:
+            # another worker wrote this session since we last saw it: write everything
+            values, appends, new_marks = self._changes(state, {})
+            written = self.backend.write(session_id, None, values, appends)
+        self.bytes_written += sum(
+            sum(len(b) for b in v) if isinstance(v, list) else len(v) for v in values.values()
+        ) + sum(len(b) for items in appends.values() for b in items)
+        self._remember(session_id, written, new_marks)
+
+    def delete(self, session_id):
+        self.backend.delete(session_id)
+        with self._lock:
+            self._known.pop(session_id, None)
+
+    def __len__(self):
+        return len(self.backend)
+
+
+def backend_from_url(url):
+    if url.startswith("memory://"):
+        return MemoryBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    if url.startswith("fakeredis://"):
+        import fakeredis
+
+        return RedisBackend(fakeredis.FakeRedis())
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        import redis
+
+        return RedisBackend(redis.Redis.from_url(url))
+    raise ValueError(f"Unsupported SESSION_STORE_URL: {url}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """Process-wide store for SESSION_STORE_URL (falls back to memory if the SQLite file can't be opened)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            try:
+                backend = backend_from_url(SESSION_STORE_URL)
+            except sqlite3.Error:
+                backend = MemoryBackend()
+            _store = SessionStore(backend)
+        return _store
@@ -0,0 +1,85 @@
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from text_vectors import HashedTfidf
+from tracing import span
+
+# ----------------------------
+# Local symptom -> disease classifier (fast path before the Cohere classifier)
+# ----------------------------
+SYMPTOM_PATHS = ["symptoms.json"]
+LOCAL_THRESHOLD = float(os.getenv("SYMPTOM_LOCAL_THRESHOLD", 0.5))
+TOP_K = 8
+
+Prediction = namedtuple("Prediction", ["disease", "score", "candidates"])
+
+
+def load_intents(paths=SYMPTOM_PATHS):
+    """Read intent-style files ({"intents": [{"tag", "patterns"}]}) into (tag, pattern) pairs."""
+    pairs = []
+    for p in paths:
+        if not os.path.exists(p):
+            continue
+        with open(p, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        for it in raw.get("intents", []):
+            tag = it.get("tag") or it.get("disease") or ""
+            for pattern in it.get("patterns", []):
+                if tag and pattern:
+                    pairs.append((tag, pattern))
+    return pairs
+
+
+class SymptomClassifier:
+    """Nearest-pattern classifier: a disease scores the best cosine of any of its patterns.
+
+    Tags are resolved through the DiseaseIndex so predictions are always
+    knowledge-base names; tags with no matching disease are skipped.
+    """
+
+    def __init__(self, pairs, index, n_features=4096):
+        labels, patterns = [], []
+        for tag, pattern in pairs:
+            name = index.exact_name(tag) or index.fuzzy_name(tag)
+            if name:
+                labels.append(name)
+                patterns.append(pattern)
+        # include the disease names themselves so "migraine" alone scores high
+        for name in sorted(set(labels)):
+            labels.append(name)
+            patterns.append(name)
+
+        self.diseases = sorted(set(labels))
+        disease_ids = {name: i for i, name in enumerate(self.diseases)}
+        order = np.argsort([disease_ids[name] for name in labels], kind="stable")
+        self.vectorizer = HashedTfidf(n_features)
+        self.matrix = self.vectorizer.fit_transform([patterns[i] for i in order]) if patterns else np.zeros((0, n_features), np.float32)
+        sorted_ids = np.array([disease_ids[labels[i]] for i in order], dtype=np.int64)
+        # start offset of each disease's block of rows, for np.maximum.reduceat
+        self.offsets = np.searchsorted(sorted_ids, np.arange(len(self.diseases)))
+
+    @classmethod
+    def from_files(cls, index, paths=SYMPTOM_PATHS):
+        return cls(load_intents(paths), index)
+
+    def scores(self, text: str):
+        if not self.diseases:
+            return np.zeros(0, dtype=np.float32)
+        sims = self.matrix @ self.vectorizer.transform([text])[0]
+        return np.maximum.reduceat(sims, self.offsets)
+
+    @span("local_classifier")
+    def predict(self, text: str, threshold: float = LOCAL_THRESHOLD, k: int = TOP_K):
+        """Best disease if its score clears `threshold`, plus the top-k shortlist either way."""
+        scores = self.scores(text)
+        if not len(scores):
+            return Prediction(None, 0.0, [])
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        candidates = [self.diseases[i] for i in top if scores[i] > 0]
+        best = float(scores[top[0]])
+        return Prediction(self.diseases[top[0]] if best >= threshold else None, best, candidates)
@@ -0,0 +1,80 @@
+import re
+import zlib
+from collections import Counter
+
+import numpy as np
+
+# ----------------------------
+# Hashed TF-IDF vectors (word uni/bi-grams + character trigrams)
+# ----------------------------
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "an", "and", "the", "i", "im", "i'm", "me", "my", "is", "am", "are", "was", "it", "of", "to", "in",
+    "on", "for", "with", "at", "have", "has", "had", "feel", "feeling", "since", "so", "very", "really", "be",
+}
+
+
+def tokenize(text: str):
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def features(text: str):
+    """Word unigrams, word bigrams and per-word character trigrams (robust to typos)."""
+    words = tokenize(text)
+    feats = list(words)
+    feats += [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"#{w}#"
+        feats += [f"~{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return feats
+
+
+def bucket(feature: str, n_features: int) -> int:
+    # crc32 is stable across processes (unlike hash()), so saved matrices stay valid
+    return zlib.crc32(feature.encode("utf-8")) % n_features
+
+
+class HashedTfidf:
+    """Stateless hashing plus an IDF vector learned from the fitted corpus.
+
+    Rows returned by transform() are L2-normalized, so a dot product is the cosine.
+    """
+
+    def __init__(self, n_features=4096):
+        self.n_features = n_features
+        self.idf = np.ones(n_features, dtype=np.float32)
+
+    def _counts(self, texts):
+        out = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for f in features(text):
+                out[row, bucket(f, self.n_features)] += 1.0
+        return out
+
+    def fit(self, texts):
+        counts = self._counts(texts)
+        df = (counts > 0).sum(axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1.0).astype(np.float32)
+        return self
+
+    def transform(self, texts):
+        mat = self._counts(texts)
+        np.log1p(mat, out=mat)  # sublinear tf
+        mat *= self.idf
+        norms = np.linalg.norm(mat, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return mat / norms
+
+    def fit_transform(self, texts):
+        return self.fit(texts).transform(texts)
+
+    def transform_one(self, text):
+        """Sparse transform() of a single text: (sorted bucket indices, weights), without a dense row."""
+        counts = Counter(bucket(f, self.n_features) for f in features(text))
+        if not counts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        idx = np.fromiter(sorted(counts), dtype=np.int64, count=len(counts))
+        weights = np.log1p(np.array([counts[i] for i in idx], dtype=np.float32)) * self.idf[idx]
+        norm = np.linalg.norm(weights)
+        return idx, weights / norm if norm else weights
@@ -0,0 +1,149 @@
+import contextvars
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextlib import ContextDecorator, contextmanager
+
+import metrics
+
+# ----------------------------
+# Pipeline tracing: timed spans per stage, slow-request breakdowns and sampled cProfile
+# ----------------------------
+# Every span feeds the metrics.stage_seconds{stage=...} histogram. Spans inside a request() are also
+# kept with that request; requests slower than TRACE_SLOW_MS keep their breakdown (and a profile,
+# when profiling is on) in a small in-memory list for the metrics endpoint.
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", 2000))
+PROFILE_SLOW_REQUESTS = os.getenv("PROFILE_SLOW_REQUESTS", "0") != "0"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0.05))  # fraction of requests run under cProfile
+PROFILE_TOP = 25  # functions listed per kept profile
+SLOW_LIMIT = 50
+
+_current = contextvars.ContextVar("trace", default=None)
+_slow = deque(maxlen=SLOW_LIMIT)
+_profile_lock = threading.Lock()  # one profiled request at a time keeps the overhead bounded
+_profiling = {"enabled": PROFILE_SLOW_REQUESTS, "sample_rate": PROFILE_SAMPLE_RATE}
+
+
+class RequestTrace:
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.started = time.perf_counter()
+        self.spans = []
+
+
+def record_span(name: str, seconds: float, started: float = None, ok: bool = True):
+    """Record a stage that was timed by hand (e.g. the sum of several short intervals)."""
+    metrics.observe("stage_seconds", seconds, stage=name)
+    trace = _current.get()
+    if trace is not None:
+        offset = (started if started is not None else time.perf_counter() - seconds) - trace.started
+        trace.spans.append((name, offset, seconds, ok))
+
+
+class span(ContextDecorator):
+    """Time one pipeline stage: `with span("fuzzy_match"): ...` or `@span("classify_llm")`."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def _recreate_cm(self):
+        # a fresh timer per decorated call, so one decorator is safe to share between threads
+        return span(self.name)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record_span(self.name, time.perf_counter() - self._started, self._started, exc_type is None)
+        return False
+
+
+def traced_iter(name: str, iterable):
+    """Yield from `iterable`, recording only the time spent producing items (not the consumer's) as one span."""
+    it = iter(iterable)
+    started, seconds, ok = time.perf_counter(), 0.0, True
+    try:
+        while True:
+            t0 = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                seconds += time.perf_counter() - t0
+                return
+            except Exception:
+                seconds += time.perf_counter() - t0
+                ok = False
+                raise
+            seconds += time.perf_counter() - t0
+            yield item
+    finally:
+        record_span(name, seconds, started, ok)
+
+
+def set_profiling(enabled: bool, sample_rate: float = None):
+    """Turn sampled cProfile of requests on or off at runtime."""
+    _profiling["enabled"] = enabled
+    if sample_rate is not None:
+        _profiling["sample_rate"] = sample_rate
+
+
+def _start_profiler():
+    if not _profiling["enabled"] or random.random() >= _profiling["sample_rate"]:
+        return None
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # another profiler is active in this thread
+        _profile_lock.release()
+        return None
+    return profiler
+
+
+def _stop_profiler(profiler, keep: bool):
+    profiler.disable()
+    _profile_lock.release()
+    if not keep:
+        return None
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+    return out.getvalue()
+
+
+@contextmanager
+def request(name: str, **attrs):
+    """Collect the spans of one request; slow requests keep their breakdown (and profile, if sampled).
+
+    Only the calling thread is profiled: work on the LLM pool shows up as time spent waiting.
+    """
+    trace = RequestTrace(name, attrs)
+    token = _current.set(trace)
+    profiler = _start_profiler()
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        seconds = time.perf_counter() - trace.started
+        slow = seconds * 1e3 >= TRACE_SLOW_MS
+        profile = _stop_profiler(profiler, slow) if profiler is not None else None
+        if slow:
+            _slow.append({
+                "name": name, **trace.attrs, "seconds": seconds, "at": time.time(), "profile": profile,
+                "spans": [{"stage": s, "offset": round(o, 6), "seconds": round(d, 6), "ok": ok} for s, o, d, ok in trace.spans],
+            })
+
+
+def current_request():
+    return _current.get()
+
+
+def slow_requests():
+    return list(_slow)